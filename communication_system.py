@@ -3,14 +3,14 @@
 Fire Detection System Communication Layer
 Handles data transmission, message formatting, and alert distribution
 Can be fully developed and tested without hardware, with simulated/mock sensor data
+asyncio and aiohttp are imported on first use so formatter-only processes start fast
 """
 
 import json
-import asyncio
-import aiohttp
 import logging
+import time
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Callable
+from typing import Dict, Iterable, List, Optional, Callable
 from dataclasses import dataclass, asdict
 from enum import Enum
 import hashlib
@@ -63,12 +63,24 @@ class AlertContact:
     priority: int  # 1 = highest priority
     channels: List[CommunicationChannel]
 
+@dataclass
+class PendingEscalation:
+    """An escalation timer that has not fired yet; deadline is a Unix timestamp"""
+    message: DeviceMessage
+    deadline: float
+
 @dataclass
 class AlertConfig:
     escalation_delay_minutes: int = 5
     max_retries: int = 3
     require_acknowledgment: bool = True
     auto_escalate: bool = True
+    http_endpoint: str = "https://api.example.com/fire-alerts"  # Replace with actual endpoint
+    webhook_url: str = "https://hooks.slack.com/services/YOUR/WEBHOOK/URL"  # Replace with actual webhook
+    sms_gateway_url: Optional[str] = None  # HTTP SMS gateway; None logs only
+    request_timeout_s: float = 10.0
+    retry_initial_s: float = 1.0   # Backoff for resending buffered messages after a failed send
+    retry_max_s: float = 60.0
 
 class MessageFormatter:
     """Formats messages for different communication channels"""
@@ -177,7 +189,8 @@ Please respond immediately if this is a critical alert.
                 "flame_detected": message.sensor_data.flame_detected,
                 "wind_speed_mps": message.sensor_data.wind_speed_mps,
                 "wind_direction_deg": message.sensor_data.wind_direction_deg,
-                "barometric_pressure_hpa": message.sensor_data.barometric_pressure_hpa
+                "barometric_pressure_hpa": message.sensor_data.barometric_pressure_hpa,
+                "fault_flags": message.sensor_data.fault_flags
             }
         
         if message.risk_assessment:
@@ -187,18 +200,31 @@ Please respond immediately if this is a critical alert.
                 "recommended_actions": message.risk_assessment.recommended_actions,
                 "confidence": message.risk_assessment.confidence
             }
+            if message.risk_assessment.forecast:
+                payload["risk_assessment"]["forecast"] = asdict(message.risk_assessment.forecast)
         
         return json.dumps(payload, indent=2)
 
 class CommunicationManager:
     """Manages all communication channels and message routing"""
     
-    def __init__(self, config: AlertConfig):
+    def __init__(self, config: AlertConfig, offline_buffer=None):
+        import asyncio
+        
         self.config = config
+        self.offline_buffer = offline_buffer  # store_and_forward.OfflineBuffer
+        self.link_up: Dict[CommunicationChannel, bool] = {channel: True for channel in CommunicationChannel}
         self.contacts: List[AlertContact] = []
         self.message_queue = asyncio.Queue()
         self.sent_messages: Dict[str, datetime] = {}
         self.acknowledgments: Dict[str, bool] = {}
+        self.pending_escalations: Dict[str, PendingEscalation] = {}
+        self._escalation_tasks: Dict[str, "asyncio.Task"] = {}
+        self._retry_task: Optional["asyncio.Task"] = None
+        self._retry_requested = False
+        self._drain_lock = asyncio.Lock()
+        self._session = None  # Shared aiohttp.ClientSession, created on first HTTP send
+        self.lora_link = None  # lora_codec.LoRaLink for CommunicationChannel.LORA
         self.logger = logging.getLogger(__name__)
         
         # Communication channel handlers
@@ -208,6 +234,7 @@ class CommunicationManager:
             CommunicationChannel.EMAIL: self._send_email,
             CommunicationChannel.WEBHOOK: self._send_webhook,
             CommunicationChannel.MQTT: self._send_mqtt,
+            CommunicationChannel.LORA: self._send_lora,
         }
     
     def add_contact(self, contact: AlertContact):
@@ -225,17 +252,121 @@ class CommunicationManager:
         # Send to each contact via their preferred channels
         for contact in contacts_to_notify:
             for channel in contact.channels:
-                try:
-                    await self._send_via_channel(message, contact, channel)
-                except Exception as e:
-                    self.logger.error(f"Failed to send via {channel.value} to {contact.name}: {e}")
+                await self._deliver(message, contact, channel)
         
         # Store message for potential escalation
         self.sent_messages[message.message_id] = datetime.now(timezone.utc)
         
         # Start escalation timer for critical messages
         if message.risk_level in [RiskLevel.CRITICAL, RiskLevel.HIGH] and self.config.auto_escalate:
-            asyncio.create_task(self._start_escalation_timer(message))
+            self._schedule_escalation(message, time.time() + self.config.escalation_delay_minutes * 60)
+    
+    async def _deliver(self, message: DeviceMessage, contact: AlertContact, channel: CommunicationChannel):
+        """Send now, or buffer for later if the link is down or the send fails"""
+        if self.offline_buffer is not None and not self.link_up[channel]:
+            self._buffer(message, contact, channel)
+            return
+        try:
+            await self._send_via_channel(message, contact, channel)
+        except Exception as e:
+            self.logger.error(f"Failed to send via {channel.value} to {contact.name}: {e}")
+            if self.offline_buffer is not None:
+                self._buffer(message, contact, channel)
+    
+    def _buffer(self, message: DeviceMessage, contact: AlertContact, channel: CommunicationChannel):
+        if not self.offline_buffer.put(message, contact, channel):
+            self.logger.error(f"Offline buffer full, dropped {message.message_id} for {contact.name} via {channel.value}")
+        elif self.link_up[channel]:
+            # The send failed on a link that is still up, so no reconnect will drain it
+            self._schedule_retry()
+    
+    def _schedule_retry(self):
+        import asyncio
+        
+        self._retry_requested = True
+        if self._retry_task is None or self._retry_task.done():
+            self._retry_task = asyncio.create_task(self._retry_buffered())
+    
+    async def _retry_buffered(self):
+        """Drain with exponential backoff until nothing on an up link is left to retry"""
+        import asyncio
+        
+        delay = self.config.retry_initial_s
+        while True:
+            await asyncio.sleep(delay)
+            self._retry_requested = False
+            sent, failed = await self._drain(None)
+            if not failed and not self._retry_requested:
+                return
+            # Back off only while nothing gets through
+            delay = self.config.retry_initial_s if sent else min(delay * 2, self.config.retry_max_s)
+    
+    async def set_link_state(self, channel: CommunicationChannel, up: bool) -> int:
+        """Record link state from the modem/link monitor; on reconnect the offline buffer drains"""
+        was_up = self.link_up[channel]
+        self.link_up[channel] = up
+        self.logger.info(f"Link {channel.value} {'up' if up else 'down'}")
+        if up and not was_up and self.offline_buffer is not None:
+            return await self.drain_offline_buffer(channel)
+        return 0
+    
+    async def drain_offline_buffer(self, channel: Optional[CommunicationChannel] = None) -> int:
+        """Resend buffered messages in priority order; a channel stops draining at its first failure"""
+        if self.offline_buffer is None:
+            return 0
+        sent, failed = await self._drain(channel)
+        if failed:
+            self._schedule_retry()
+        return sent
+    
+    async def _drain(self, channel: Optional[CommunicationChannel]):
+        """Returns (messages sent, channels that failed)"""
+        async with self._drain_lock:
+            sent = 0
+            failed = set()
+            for record in self.offline_buffer.pending(channel):
+                if record.channel in failed or not self.link_up[record.channel]:
+                    continue
+                try:
+                    await self._send_via_channel(record.message, record.contact, record.channel)
+                except Exception as e:
+                    self.logger.error(f"Drain via {record.channel.value} failed, keeping buffered messages: {e}")
+                    failed.add(record.channel)
+                    continue
+                # Only release the slot if it was not overwritten by newer data while we were sending
+                self.offline_buffer.remove(record.slot, record.seq)
+                sent += 1
+            if sent:
+                self.logger.info(f"Drained {sent} buffered messages, {len(self.offline_buffer)} still pending")
+            return sent, failed
+    
+    def _schedule_escalation(self, message: DeviceMessage, deadline: float):
+        """Track and start an escalation timer"""
+        import asyncio
+        
+        self.pending_escalations[message.message_id] = PendingEscalation(message, deadline)
+        self._escalation_tasks[message.message_id] = asyncio.create_task(
+            self._start_escalation_timer(message, max(0.0, deadline - time.time())))
+    
+    def export_escalations(self, device_ids: Iterable[str]) -> List[PendingEscalation]:
+        """Hand off unacknowledged escalations for devices moving to another node; local timers stop"""
+        device_ids = set(device_ids)
+        exported = []
+        for message_id, pending in list(self.pending_escalations.items()):
+            if pending.message.device_id not in device_ids:
+                continue
+            del self.pending_escalations[message_id]
+            task = self._escalation_tasks.pop(message_id, None)
+            if task:
+                task.cancel()
+            if not self.acknowledgments.get(message_id, False):
+                exported.append(pending)
+        return exported
+    
+    def import_escalations(self, escalations: List[PendingEscalation]):
+        """Resume escalations handed off by another node, keeping their original deadlines"""
+        for pending in escalations:
+            self._schedule_escalation(pending.message, pending.deadline)
     
     def _get_contacts_for_risk_level(self, risk_level: RiskLevel) -> List[AlertContact]:
         """Determine which contacts to notify based on risk level"""
@@ -256,27 +387,47 @@ class CommunicationManager:
         else:
             self.logger.warning(f"No handler for channel: {channel.value}")
     
+    def _http_session(self):
+        """Connection pool shared by every HTTP-based channel"""
+        if self._session is None or self._session.closed:
+            import aiohttp
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.config.request_timeout_s))
+        return self._session
+    
+    async def close(self):
+        """Stop retrying buffered messages (they stay on disk) and release the shared HTTP session"""
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            self._retry_task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
     async def _send_http_post(self, message: DeviceMessage, contact: AlertContact):
         """Send message via HTTP POST to API endpoint"""
-        url = "https://api.example.com/fire-alerts"  # Replace with actual endpoint
+        url = self.config.http_endpoint
         payload = MessageFormatter.format_json_payload(message)
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, data=payload, headers={"Content-Type": "application/json"}) as response:
-                if response.status == 200:
-                    self.logger.info(f"HTTP POST sent successfully to {url}")
-                else:
-                    self.logger.error(f"HTTP POST failed: {response.status}")
+        async with self._http_session().post(url, data=payload, headers={"Content-Type": "application/json"}) as response:
+            if response.status == 200:
+                self.logger.info(f"HTTP POST sent successfully to {url}")
+            else:
+                raise RuntimeError(f"HTTP POST failed: {response.status}")
     
     async def _send_sms(self, message: DeviceMessage, contact: AlertContact):
-        """Send SMS alert (placeholder - integrate with SMS service)"""
+        """Send SMS alert through the configured HTTP gateway (logged only when none is set)"""
         sms_text = MessageFormatter.format_sms_alert(message)
         
-        # Placeholder for SMS service integration (Twilio, AWS SNS, etc.)
-        self.logger.info(f"SMS Alert sent to {contact.phone}: {sms_text[:50]}...")
+        if self.config.sms_gateway_url is None:
+            self.logger.info(f"SMS Alert sent to {contact.phone}: {sms_text[:50]}...")
+            return
         
-        # In real implementation, use SMS service API:
-        # await sms_service.send(phone=contact.phone, message=sms_text)
+        async with self._http_session().post(self.config.sms_gateway_url,
+                                             json={"to": contact.phone, "text": sms_text}) as response:
+            if response.status == 200:
+                self.logger.info(f"SMS Alert sent to {contact.phone}")
+            else:
+                raise RuntimeError(f"SMS gateway failed: {response.status}")
     
     async def _send_email(self, message: DeviceMessage, contact: AlertContact):
         """Send email alert (placeholder - integrate with email service)"""
@@ -290,7 +441,7 @@ class CommunicationManager:
     
     async def _send_webhook(self, message: DeviceMessage, contact: AlertContact):
         """Send webhook notification"""
-        webhook_url = "https://hooks.slack.com/services/YOUR/WEBHOOK/URL"  # Replace with actual webhook
+        webhook_url = self.config.webhook_url
         payload = {
             "text": f"Fire Alert: {message.risk_level.name}",
             "attachments": [
@@ -306,12 +457,11 @@ class CommunicationManager:
             ]
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(webhook_url, json=payload) as response:
-                if response.status == 200:
-                    self.logger.info("Webhook sent successfully")
-                else:
-                    self.logger.error(f"Webhook failed: {response.status}")
+        async with self._http_session().post(webhook_url, json=payload) as response:
+            if response.status == 200:
+                self.logger.info("Webhook sent successfully")
+            else:
+                raise RuntimeError(f"Webhook failed: {response.status}")
     
     async def _send_mqtt(self, message: DeviceMessage, contact: AlertContact):
         """Send MQTT message (placeholder)"""
@@ -324,9 +474,28 @@ class CommunicationManager:
         # In real implementation:
         # await mqtt_client.publish(topic, payload)
     
-    async def _start_escalation_timer(self, message: DeviceMessage):
+    async def _send_lora(self, message: DeviceMessage, contact: AlertContact):
+        """Send a compact binary frame over LoRa (JSON does not fit the payload limit)"""
+        if self.lora_link is None:
+            raise RuntimeError("No LoRa link configured")
+        
+        # Raises lora_codec.DutyCycleExceeded while the radio must stay silent
+        acknowledged = self.lora_link.send(message)
+        if not acknowledged and (message.message_type == MessageType.ALERT
+                                 or message.risk_level.value >= RiskLevel.HIGH.value):
+            # Unconfirmed alerts go to the offline buffer; routine telemetry is superseded by the next reading
+            raise RuntimeError(f"LoRa frame for {message.device_id} was not acknowledged")
+        self.logger.info(f"LoRa frame sent for {message.device_id} ({'acknowledged' if acknowledged else 'no ack'})")
+    
+    async def _start_escalation_timer(self, message: DeviceMessage, delay_s: Optional[float] = None):
         """Start escalation timer for unacknowledged messages"""
-        await asyncio.sleep(self.config.escalation_delay_minutes * 60)
+        import asyncio
+        
+        if delay_s is None:
+            delay_s = self.config.escalation_delay_minutes * 60
+        await asyncio.sleep(delay_s)
+        self.pending_escalations.pop(message.message_id, None)
+        self._escalation_tasks.pop(message.message_id, None)
         
         # Check if message was acknowledged
         if not self.acknowledgments.get(message.message_id, False):
@@ -338,10 +507,7 @@ class CommunicationManager:
             
             for contact in self.contacts:
                 for channel in contact.channels:
-                    try:
-                        await self._send_via_channel(escalated_message, contact, channel)
-                    except Exception as e:
-                        self.logger.error(f"Escalation failed for {contact.name}: {e}")
+                    await self._deliver(escalated_message, contact, channel)
     
     def acknowledge_message(self, message_id: str, contact_name: str):
         """Record message acknowledgment"""
@@ -391,6 +557,8 @@ class DataLogger:
 # Demo/Test Functions
 async def demo_communication_system():
     """Demonstrate the communication system"""
+    import asyncio
+    
     print("🌐 Communication System Demo")
     print("=" * 40)
     
@@ -419,10 +587,11 @@ async def demo_communication_system():
         comm_manager.add_contact(contact)
     
     # Create test messages
-    from risk_assessment_engine import SensorSimulator, RiskAssessmentEngine, FuelType
+    from risk_assessment_engine import SensorSimulator, FuelType
+    from async_engine import AsyncRiskEngine
     
     simulator = SensorSimulator(FuelType.PETROL)
-    risk_engine = RiskAssessmentEngine(FuelType.PETROL)
+    risk_engine = AsyncRiskEngine(FuelType.PETROL)  # Scores off the event loop
     
     # Test different scenarios
     scenarios = [
@@ -437,7 +606,7 @@ async def demo_communication_system():
         
         # Generate sensor reading and risk assessment
         sensor_reading = simulator.generate_reading(scenario)
-        risk_assessment = risk_engine.assess_risk(sensor_reading)
+        risk_assessment = await risk_engine.assess("TANK_A_001", sensor_reading)
         
         # Create device message
         device_message = DeviceMessage(
@@ -464,6 +633,10 @@ async def demo_communication_system():
         print(MessageFormatter.format_json_payload(device_message)[:200] + "...")
         
         await asyncio.sleep(1)  # Brief delay between tests
+    
+    await risk_engine.close()
+    await comm_manager.close()
 
 if __name__ == "__main__":
+    import asyncio
     asyncio.run(demo_communication_system())
\ No newline at end of file
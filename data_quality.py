@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Sensor Data Quality Pipeline
+Streaming pre-processing stage that runs before RiskAssessmentEngine.assess_risk.
+Detects stuck, spiking and implausibly fast-changing sensors, fills gaps and tags
+readings with SensorFault flags. The batch path produces the same flags for backfill
+"""
+
+import math
+import random
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from risk_assessment_engine import SensorReading, SensorFault
+
+@dataclass
+class ChannelLimits:
+    """Plausibility limits for one analog sensor channel"""
+    min_value: float
+    max_value: float
+    max_rate_per_s: float      # Larger changes are treated as sensor faults
+    stuck_tolerance: float     # Half the sensor resolution: smaller changes are the same reported value
+    fallback: float            # Used to fill gaps before any valid sample has arrived
+
+# Filtered channels; flame inputs are never filtered so direct flame detection is not delayed
+# Resolutions: MQ-2 1 ppm after calibration, SHT30 0.01 °C / 0.01 % RH
+CHANNEL_LIMITS = {
+    "gas_lpg_ppm": ChannelLimits(0.0, 100000.0, 5000.0, 0.5, 0.0),
+    "gas_smoke_ppm": ChannelLimits(0.0, 10000.0, 2000.0, 0.5, 0.0),
+    "temperature_c": ChannelLimits(-40.0, 125.0, 5.0, 0.005, 25.0),
+    "humidity_rh": ChannelLimits(0.0, 100.0, 10.0, 0.005, 50.0),
+}
+
+# Hampel constant: scales MAD to a standard deviation estimate for Gaussian noise
+MAD_SCALE = 1.4826
+
+class _ChannelFilter:
+    """Per-channel streaming state, constant work per sample"""
+
+    def __init__(self, limits: ChannelLimits, window: int, n_sigmas: float,
+                 step_samples: int, alpha: float):
+        self.limits = limits
+        self.n_sigmas = n_sigmas
+        self.step_samples = step_samples
+        self.alpha = alpha
+        self.window = deque(maxlen=window)
+        self.prev_value: Optional[float] = None
+        self.prev_time: Optional[float] = None
+        self.run_length = 0        # Consecutive valid samples without a change
+        self.step_run = 0          # Consecutive outliers on the same side of the median
+        self.step_direction = 0
+        self.ewma: Optional[float] = None
+
+    @property
+    def at_floor(self) -> bool:
+        """Resting at the bottom of the range (e.g. 0 ppm in clean air), where a flat output is expected"""
+        return self.prev_value is not None and self.prev_value <= self.limits.min_value + self.limits.stuck_tolerance
+
+    def update(self, timestamp: float, value: Optional[float]) -> Tuple[float, int]:
+        """
+        Return (cleaned value, fault flags) for one sample
+        STUCK is decided by DataQualityPipeline, which compares run lengths across channels
+        """
+        flags = SensorFault.NONE
+
+        if value is None or not math.isfinite(value):
+            flags |= SensorFault.GAP
+        elif value < self.limits.min_value or value > self.limits.max_value:
+            flags |= SensorFault.OUT_OF_RANGE | SensorFault.GAP
+
+        if flags:
+            # Hold the smoothed level until the sensor recovers
+            filled = self.ewma if self.ewma is not None else self.limits.fallback
+            return filled, int(flags)
+
+        # Run of samples without a change, for stuck-at detection
+        if self.prev_value is not None and abs(value - self.prev_value) <= self.limits.stuck_tolerance:
+            self.run_length += 1
+        else:
+            self.run_length = 1
+
+        # Hampel filter over the trailing window
+        self.window.append(value)
+        median = statistics.median(self.window)
+        if len(self.window) == self.window.maxlen:
+            mad = statistics.median(abs(v - median) for v in self.window)
+            if mad > 0 and abs(value - median) > self.n_sigmas * MAD_SCALE * mad:
+                flags |= SensorFault.SPIKE
+
+        # Rate-of-change check against the previous valid sample
+        if self.prev_value is not None:
+            dt = max(timestamp - self.prev_time, 1e-3)
+            if abs(value - self.prev_value) / dt > self.limits.max_rate_per_s:
+                flags |= SensorFault.RATE_OF_CHANGE
+
+        # Outliers that persist on one side of the median are a real level change (e.g. a leak),
+        # not a glitch: pass them through instead of holding the old median
+        if flags & (SensorFault.SPIKE | SensorFault.RATE_OF_CHANGE):
+            direction = (value > median) - (value < median)
+            self.step_run = self.step_run + 1 if direction == self.step_direction else 1
+            self.step_direction = direction
+        else:
+            self.step_run = 0
+            self.step_direction = 0
+        if self.step_run >= self.step_samples:
+            flags &= ~(SensorFault.SPIKE | SensorFault.RATE_OF_CHANGE)
+
+        cleaned = median if flags & (SensorFault.SPIKE | SensorFault.RATE_OF_CHANGE) else value
+
+        self.prev_value = value
+        self.prev_time = timestamp
+        self.ewma = cleaned if self.ewma is None else self.alpha * cleaned + (1 - self.alpha) * self.ewma
+        return cleaned, int(flags)
+
+class DataQualityPipeline:
+    """Cleans and tags sensor readings per device before risk assessment"""
+
+    def __init__(self, window: int = 11, n_sigmas: float = 3.5, stuck_samples: int = 20,
+                 alpha: float = 0.3, channel_limits: Optional[Dict[str, ChannelLimits]] = None,
+                 step_samples: int = 3):
+        self.window = window
+        self.n_sigmas = n_sigmas
+        self.stuck_samples = stuck_samples
+        self.step_samples = step_samples  # Same-side outliers in a row accepted as a real step
+        self.alpha = alpha
+        self.channel_limits = channel_limits or CHANNEL_LIMITS
+        self.devices: Dict[str, Dict[str, _ChannelFilter]] = {}
+
+    def process(self, device_id: str, reading: SensorReading) -> SensorReading:
+        """Streaming path: clean one reading, O(1) work per channel"""
+        filters = self.devices.get(device_id)
+        if filters is None:
+            filters = {
+                name: _ChannelFilter(limits, self.window, self.n_sigmas, self.step_samples, self.alpha)
+                for name, limits in self.channel_limits.items()
+            }
+            self.devices[device_id] = filters
+
+        cleaned = {}
+        flags = reading.fault_flags
+        updated = []
+        for name, channel_filter in filters.items():
+            cleaned[name], channel_flags = channel_filter.update(reading.timestamp, getattr(reading, name))
+            flags |= channel_flags
+            if not channel_flags & SensorFault.GAP:
+                updated.append(channel_filter)
+
+        # Stuck: flat for stuck_samples while another channel changed, and not resting at the floor
+        for channel_filter in updated:
+            run = channel_filter.run_length
+            if (run >= self.stuck_samples and not channel_filter.at_floor
+                    and any(other.run_length < run for other in filters.values() if other is not channel_filter)):
+                flags |= SensorFault.STUCK
+                break
+
+        return replace(reading, fault_flags=flags, **cleaned)
+
+    def smoothed(self, device_id: str) -> Dict[str, Optional[float]]:
+        """Current EWMA level of each channel for a device"""
+        filters = self.devices.get(device_id, {})
+        return {name: channel_filter.ewma for name, channel_filter in filters.items()}
+
+    def reset_device(self, device_id: str):
+        """Drop filter state, e.g. after a sensor is replaced"""
+        self.devices.pop(device_id, None)
+
+    def process_batch(self, readings: List[SensorReading]) -> List[SensorReading]:
+        """
+        Backfill path: clean a time-ordered batch from one device with vectorized NumPy
+        Produces the same fault flags as the streaming path; gaps are linearly
+        interpolated since later samples are known
+        """
+        if not readings:
+            return []
+
+        timestamps = np.array([r.timestamp for r in readings], dtype=float)
+        flags = np.array([r.fault_flags for r in readings], dtype=np.int64)
+        cleaned, runs, candidates = {}, {}, {}
+        for name, limits in self.channel_limits.items():
+            values = np.array([np.nan if getattr(r, name) is None else getattr(r, name) for r in readings],
+                              dtype=float)
+            cleaned[name], channel_flags, runs[name], candidates[name] = self._clean_channel_batch(
+                timestamps, values, limits)
+            flags |= channel_flags
+
+        for name in runs:
+            others = [runs[other] for other in runs if other != name]
+            changing = np.any([run < runs[name] for run in others], axis=0) if others else False
+            flags[candidates[name] & changing] |= SensorFault.STUCK
+
+        return [
+            replace(reading, fault_flags=int(flags[i]), **{name: float(cleaned[name][i]) for name in cleaned})
+            for i, reading in enumerate(readings)
+        ]
+
+    def _clean_channel_batch(self, timestamps: np.ndarray, values: np.ndarray, limits: ChannelLimits
+                             ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (cleaned, flags, unchanged run length, stuck candidates); gaps carry the run forward"""
+        flags = np.zeros(len(values), dtype=np.int64)
+        cleaned = values.copy()
+        runs = np.zeros(len(values), dtype=np.int64)
+        candidates = np.zeros(len(values), dtype=bool)
+
+        invalid = ~np.isfinite(values)
+        with np.errstate(invalid="ignore"):
+            out_of_range = ~invalid & ((values < limits.min_value) | (values > limits.max_value))
+        gap = invalid | out_of_range
+        flags[out_of_range] |= SensorFault.OUT_OF_RANGE
+        flags[gap] |= SensorFault.GAP
+
+        valid_idx = np.flatnonzero(~gap)
+        if valid_idx.size == 0:
+            cleaned[:] = limits.fallback
+            return cleaned, flags, runs, candidates
+
+        v = values[valid_idx]
+        t = timestamps[valid_idx]
+        positions = np.arange(v.size)
+        valid_flags = np.zeros(v.size, dtype=np.int64)
+
+        # Stuck-at: run length of consecutive unchanged samples, compared across channels by the caller
+        unchanged = np.concatenate(([False], np.abs(np.diff(v)) <= limits.stuck_tolerance))
+        last_change = np.maximum.accumulate(np.where(unchanged, 0, positions))
+        run = positions - last_change + 1
+        runs[valid_idx] = run
+        last_valid = np.maximum.accumulate(np.where(gap, -1, np.arange(len(values))))
+        runs = np.where(last_valid >= 0, runs[last_valid], 0)
+        candidates[valid_idx] = (run >= self.stuck_samples) & (v > limits.min_value + limits.stuck_tolerance)
+
+        # Hampel over trailing windows; NaN padding gives the partial windows the streaming path sees
+        padded = np.concatenate((np.full(self.window - 1, np.nan), v))
+        windows = sliding_window_view(padded, self.window)
+        median = np.nanmedian(windows, axis=1)
+        mad = np.nanmedian(np.abs(windows - median[:, None]), axis=1)
+        spike = (positions >= self.window - 1) & (mad > 0) & (np.abs(v - median) > self.n_sigmas * MAD_SCALE * mad)
+        valid_flags[spike] |= SensorFault.SPIKE
+
+        # Rate of change between consecutive valid samples
+        rate = np.abs(np.diff(v)) / np.maximum(np.diff(t), 1e-3)
+        rate_violation = np.concatenate(([False], rate > limits.max_rate_per_s))
+        valid_flags[rate_violation] |= SensorFault.RATE_OF_CHANGE
+
+        # Same-side outliers in a row: a real level change, passed through unflagged
+        outlier = spike | rate_violation
+        direction = np.where(outlier, np.sign(v - median), 0)
+        continues = np.concatenate(([False], outlier[1:] & outlier[:-1] & (direction[1:] == direction[:-1])))
+        step_start = np.maximum.accumulate(np.where(continues, 0, positions))
+        step = outlier & (positions - step_start + 1 >= self.step_samples)
+        valid_flags[step] &= ~(SensorFault.SPIKE | SensorFault.RATE_OF_CHANGE)
+
+        flags[valid_idx] |= valid_flags
+        cleaned[valid_idx] = np.where(outlier & ~step, median, v)
+        if gap.any():
+            cleaned[gap] = np.interp(timestamps[gap], t, cleaned[valid_idx])
+        return cleaned, flags, runs, candidates
+
+def ewma_batch(values: np.ndarray, alpha: float = 0.3, block: int = 256) -> np.ndarray:
+    """
+    Vectorized EWMA matching the streaming recurrence (first sample seeds the average)
+    Works in fixed-size blocks so the decay weights never underflow
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.empty_like(values)
+    if values.size == 0:
+        return result
+
+    lags = np.subtract.outer(np.arange(block), np.arange(block))
+    weights = np.where(lags >= 0, alpha * (1 - alpha) ** np.maximum(lags, 0), 0.0)
+    carry_decay = (1 - alpha) ** (np.arange(block) + 1)
+
+    level = values[0]
+    for start in range(0, values.size, block):
+        chunk = values[start:start + block]
+        n = chunk.size
+        result[start:start + n] = weights[:n, :n] @ chunk + carry_decay[:n] * level
+        level = result[start + n - 1]
+    return result
+
+def demo_data_quality():
+    """Show a stuck gas sensor and a spike being caught before risk assessment"""
+    from risk_assessment_engine import RiskAssessmentEngine, SensorSimulator, FuelType
+
+    print("🧹 Data Quality Pipeline Demo")
+    print("=" * 40)
+
+    pipeline = DataQualityPipeline()
+    engine = RiskAssessmentEngine(FuelType.PETROL)
+    simulator = SensorSimulator(FuelType.PETROL)
+
+    start = time.time()
+    for i in range(60):
+        # The simulator's normal scenario is white noise, so smooth it into a plausible series
+        reading = simulator.generate_reading("normal")
+        reading.timestamp = start + i
+        reading.gas_lpg_ppm = 50.0 + random.gauss(0, 3)
+        reading.temperature_c = 28.0 + 0.01 * i + random.gauss(0, 0.05)
+        reading.humidity_rh = 55.0 + random.gauss(0, 0.5)
+        if i == 15:
+            reading.gas_lpg_ppm = 4000.0  # Single-sample spike on the MQ-2 channel
+        if i >= 30:
+            reading.temperature_c = 31.5  # Temperature sensor freezes
+
+        cleaned = pipeline.process("TANK_A_001", reading)
+        assessment = engine.assess_risk(cleaned)
+        if cleaned.fault_flags:
+            print(f"Reading {i+1}: flags={SensorFault(cleaned.fault_flags)!r} "
+                  f"gas {reading.gas_lpg_ppm:.0f} -> {cleaned.gas_lpg_ppm:.0f} ppm, "
+                  f"risk {assessment.risk_level.name}, confidence {assessment.confidence:.2f}")
+
+if __name__ == "__main__":
+    demo_data_quality()
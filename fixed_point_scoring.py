@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Fixed-Point Risk Scoring Core
+Integer-only reference of RiskAssessmentEngine.assess_risk (threshold dispersion mode)
+for porting to the ESP32 firmware. Scores are Q16.16, intermediates fit in int64,
+state lives in preallocated ring buffers and nothing is allocated per reading
+"""
+
+import math
+from array import array
+from typing import Tuple
+
+from risk_assessment_engine import FuelProperties, FuelType, RiskLevel, SensorReading
+
+Q_SHIFT = 16
+Q_ONE = 1 << Q_SHIFT
+
+# Trend analysis only looks at the last 10 readings
+TREND_BUFFER_SIZE = 10
+
+# Temperature inversion check (pressure > 1020 hPa, wind < 1 m/s, temperature < 10 °C)
+INVERSION_TEMP_C100 = 1000
+
+def ceil_div(numerator: int, denominator: int) -> int:
+    """
+    Integer division rounding toward +infinity (denominator > 0)
+    Every rounding step errs high, so the edge never under-calls a level the cloud would raise.
+    In C: n >= 0 ? (n + d - 1) / d : n / d
+    """
+    return -(-numerator // denominator)
+
+def _round_up(value: float) -> int:
+    # round(..., 6) first so values already at firmware resolution (e.g. 28.07 * 100) stay put
+    return math.ceil(round(value, 6))
+
+def _round_down(value: float) -> int:
+    return math.floor(round(value, 6))
+
+def quantize_reading(reading: SensorReading) -> Tuple[int, int, int, int, int, int, int, int, int]:
+    """
+    Convert a reading to the integer units the firmware works in:
+    gas ppm, temperature and humidity in hundredths, wind in mm/s, pressure in Pa
+    Each field rounds toward higher risk (gas, temperature, pressure up; humidity, wind down),
+    so quantization cannot move a reading to the safe side of a threshold. Below the
+    inversion limit colder is riskier, so temperature rounds down there
+    """
+    temp_c100 = reading.temperature_c * 100
+    return (
+        _round_up(reading.gas_lpg_ppm),
+        _round_up(reading.gas_smoke_ppm),
+        _round_up(temp_c100) if temp_c100 >= INVERSION_TEMP_C100 else _round_down(temp_c100),
+        _round_down(reading.humidity_rh * 100),
+        int(reading.flame_ir_raw),
+        int(reading.flame_uv_raw),
+        1 if reading.flame_detected else 0,
+        _round_down(reading.wind_speed_mps * 1000),
+        _round_up(reading.barometric_pressure_hpa * 100),
+    )
+
+def dequantize_reading(reading: SensorReading) -> SensorReading:
+    """Round a reading to the same resolution the fixed-point core sees"""
+    gas_lpg, gas_smoke, temp_c100, humidity_c100, ir, uv, flame, wind_mm_s, pressure_pa = quantize_reading(reading)
+    return SensorReading(
+        timestamp=reading.timestamp,
+        gas_lpg_ppm=float(gas_lpg),
+        gas_smoke_ppm=float(gas_smoke),
+        temperature_c=temp_c100 / 100,
+        humidity_rh=humidity_c100 / 100,
+        flame_ir_raw=ir,
+        flame_uv_raw=uv,
+        flame_detected=bool(flame),
+        wind_speed_mps=wind_mm_s / 1000,
+        wind_direction_deg=reading.wind_direction_deg,
+        barometric_pressure_hpa=pressure_pa / 100,
+        data_quality=reading.data_quality,
+        fault_flags=reading.fault_flags
+    )
+
+def q_to_float(value: int) -> float:
+    return value / Q_ONE
+
+class FixedPointScoringCore:
+    """Integer mirror of the rule-based engine for one device"""
+
+    def __init__(self, fuel_type: FuelType = FuelType.PETROL):
+        props = FuelProperties.FUEL_DATA[fuel_type]
+
+        # Thresholds in firmware units (all exact integers for the supported fuels)
+        self.gas_warning_ppm = props["lel_ppm"] // 10
+        self.gas_critical_ppm = props["lel_ppm"] // 4
+        self.temp_warning_c100 = props["critical_temp_c"] * 100
+        self.temp_critical_c100 = props["autoignition_c"] * 70
+        self.flame_ir_threshold = 512
+        self.flame_uv_threshold = 256
+
+        # Preallocated ring buffers for trend analysis
+        self.gas_history = array("i", [0] * TREND_BUFFER_SIZE)
+        self.temp_history = array("i", [0] * TREND_BUFFER_SIZE)
+        self.head = 0
+        self.count = 0
+
+    def reset(self):
+        self.head = 0
+        self.count = 0
+
+    def score_reading(self, reading: SensorReading) -> Tuple[int, int]:
+        return self.score(*quantize_reading(reading))
+
+    def score(self, gas_lpg_ppm: int, gas_smoke_ppm: int, temp_c100: int, humidity_c100: int,
+              flame_ir_raw: int, flame_uv_raw: int, flame_detected: int,
+              wind_mm_s: int, pressure_pa: int) -> Tuple[int, int]:
+        """Return (risk level value, Q16 risk score clamped to 1.0)"""
+        self._push(gas_lpg_ppm, temp_c100)
+
+        # 1. Immediate flame detection
+        if flame_detected or (flame_ir_raw > self.flame_ir_threshold and flame_uv_raw > self.flame_uv_threshold):
+            return RiskLevel.CRITICAL.value, Q_ONE
+
+        # 2. Gas risk (Q16)
+        gas = max(gas_lpg_ppm, gas_smoke_ppm)
+        if gas > self.gas_critical_ppm:
+            gas_q = Q_ONE
+        elif gas > self.gas_warning_ppm:
+            gas_q = ceil_div(gas << Q_SHIFT, self.gas_critical_ppm)
+        else:
+            gas_q = ceil_div(gas << Q_SHIFT, 5 * self.gas_warning_ppm)
+
+        # 3. Temperature risk (Q16)
+        if temp_c100 > self.temp_critical_c100:
+            temp_q = Q_ONE
+        elif temp_c100 > self.temp_warning_c100:
+            temp_q = ceil_div((temp_c100 - self.temp_warning_c100) << Q_SHIFT,
+                           self.temp_critical_c100 - self.temp_warning_c100)
+        else:
+            temp_q = 0
+
+        # 4. Environmental risk, accumulated in tenths
+        env_tenths = 0
+        if humidity_c100 < 3000:
+            env_tenths += 3
+        if wind_mm_s < 500:
+            env_tenths += 4
+        if pressure_pa > 102500:
+            env_tenths += 2
+        env_q = ceil_div(min(10, env_tenths) << Q_SHIFT, 10)
+
+        # 5. Trend factor (Q16)
+        trend_q = self._trend_factor()
+
+        # Weighted sum over a common denominator of 20:
+        # 0.4 gas + 0.3 temp + 0.2 env + 0.1 * 0.5 * (trend - 1)
+        numerator = 8 * gas_q + 6 * temp_q + 4 * env_q + (trend_q - Q_ONE)
+        denominator = 20
+
+        # Weather dispersion as exact fractions
+        if wind_mm_s < 500:
+            numerator, denominator = numerator * 3, denominator * 2
+        elif wind_mm_s < 2000:
+            numerator, denominator = numerator * 6, denominator * 5
+        elif wind_mm_s < 5000:
+            numerator, denominator = numerator * 4, denominator * 5
+        else:
+            numerator, denominator = numerator * 3, denominator * 5
+
+        if pressure_pa > 102000 and wind_mm_s < 1000 and temp_c100 < INVERSION_TEMP_C100:
+            numerator, denominator = numerator * 7, denominator * 5
+
+        if humidity_c100 > 5000:
+            humidity_q = Q_ONE - ((humidity_c100 - 5000) << Q_SHIFT) // 50000
+            numerator, denominator = numerator * humidity_q, denominator << Q_SHIFT
+
+        score_q = ceil_div(numerator, denominator)
+        return self._score_to_level(score_q), min(Q_ONE, score_q)
+
+    def _push(self, gas_ppm: int, temp_c100: int):
+        self.gas_history[self.head] = gas_ppm
+        self.temp_history[self.head] = temp_c100
+        self.head = (self.head + 1) % TREND_BUFFER_SIZE
+        if self.count < TREND_BUFFER_SIZE:
+            self.count += 1
+
+    def _at(self, buffer: array, age: int) -> int:
+        """Value pushed `age` readings ago (0 = latest)"""
+        return buffer[(self.head - 1 - age) % TREND_BUFFER_SIZE]
+
+    def _trend_factor(self) -> int:
+        if self.count < 5:
+            return Q_ONE
+
+        # Older window is the 5 readings before the latest 5, or the latest 5 if there are fewer than 10
+        older_offset = 5 if self.count >= 10 else 0
+        older_sum = 0
+        for age in range(older_offset, older_offset + 5):
+            older_sum += self._at(self.gas_history, age)
+        if older_sum == 0:
+            return Q_ONE
+
+        # latest / (older_sum / 5)
+        ratio_q = ceil_div((5 * self._at(self.gas_history, 0)) << Q_SHIFT, older_sum)
+
+        # Least-squares slope over the last 5 temperatures: sum((x - 2) * t) / 10,
+        # in hundredths of a degree, scaled by 0.1 into the trend factor
+        slope_sum = 0
+        for x in range(5):
+            slope_sum += (x - 2) * self._at(self.temp_history, 4 - x)
+        slope_q = ceil_div(slope_sum * Q_ONE, 10 * 10 * 100)
+
+        return max(Q_ONE // 2, min(3 * Q_ONE, ratio_q + slope_q))
+
+    @staticmethod
+    def _score_to_level(score_q: int) -> int:
+        # score < k/5 compared exactly as 5 * score < k
+        scaled = 5 * score_q
+        if scaled < Q_ONE:
+            return RiskLevel.SAFE.value
+        elif scaled < 2 * Q_ONE:
+            return RiskLevel.LOW.value
+        elif scaled < 3 * Q_ONE:
+            return RiskLevel.MEDIUM.value
+        elif scaled < 4 * Q_ONE:
+            return RiskLevel.HIGH.value
+        else:
+            return RiskLevel.CRITICAL.value
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Learned Risk Model
+Logistic regression over sensor features and their pairwise interactions, in pure NumPy.
+Trained offline from DataLogger output plus labelled incidents, and run in shadow mode
+next to RiskAssessmentEngine so both scores can be compared before it is trusted
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from risk_assessment_engine import (SensorReading, RiskAssessment, RiskAssessmentEngine,
+                                    FuelProperties, FuelType, SensorSimulator)
+
+# Core features are combined pairwise so the model can learn interactions
+CORE_FEATURES = ["gas_lel_fraction", "smoke_lel_fraction", "temp_ratio", "dryness", "calmness"]
+EXTRA_FEATURES = ["flame_ir", "flame_uv", "flame_detected", "pressure_anomaly", "data_quality"]
+FEATURE_NAMES = (CORE_FEATURES + EXTRA_FEATURES +
+                 [f"{a}*{b}" for a, b in combinations(CORE_FEATURES, 2)])
+
+@dataclass
+class IncidentLabel:
+    """A labelled incident window for one device"""
+    device_id: str
+    start: float
+    end: float
+
+def extract_features(readings: List[SensorReading], fuel_type: FuelType = FuelType.PETROL) -> np.ndarray:
+    """Build the (n_readings, n_features) design matrix"""
+    props = FuelProperties.FUEL_DATA[fuel_type]
+    raw = np.array([
+        (r.gas_lpg_ppm, r.gas_smoke_ppm, r.temperature_c, r.humidity_rh, r.wind_speed_mps,
+         r.flame_ir_raw, r.flame_uv_raw, r.flame_detected, r.barometric_pressure_hpa, r.data_quality)
+        for r in readings
+    ], dtype=float).reshape(-1, 10)
+    return features_from_array(raw, props)
+
+def features_from_array(raw: np.ndarray, props: Dict[str, float]) -> np.ndarray:
+    """Vectorized feature transform over raw sensor columns (see extract_features for order)"""
+    gas, smoke, temp, humidity, wind, ir, uv, flame, pressure, quality = raw.T
+
+    core = np.column_stack([
+        gas / props["lel_ppm"],
+        smoke / props["lel_ppm"],
+        temp / props["critical_temp_c"],
+        np.clip((50.0 - humidity) / 50.0, 0.0, 1.0),
+        1.0 / (1.0 + wind),
+    ])
+    extra = np.column_stack([
+        ir / 1023.0,
+        uv / 1023.0,
+        flame,
+        (pressure - 1013.0) / 20.0,
+        quality / 100.0,
+    ])
+    pairs = [core[:, i] * core[:, j] for i, j in combinations(range(core.shape[1]), 2)]
+    return np.column_stack([core, extra] + pairs)
+
+class LogisticRiskModel:
+    """L2-regularised logistic regression fitted with Newton (IRLS) steps"""
+
+    def __init__(self, fuel_type: FuelType = FuelType.PETROL, l2: float = 1e-2):
+        self.fuel_type = fuel_type
+        self.l2 = l2
+        self.weights: Optional[np.ndarray] = None
+        self.bias = 0.0
+        self.mean: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+
+    def fit(self, X: np.ndarray, y: np.ndarray, max_iter: int = 50, tol: float = 1e-6) -> "LogisticRiskModel":
+        """Fit on a feature matrix and 0/1 incident labels"""
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        Xs = np.column_stack([(X - self.mean) / self.scale, np.ones(len(X))])
+
+        theta = np.zeros(Xs.shape[1])
+        penalty = np.full(Xs.shape[1], self.l2)
+        penalty[-1] = 0.0  # Bias is not regularised
+
+        for _ in range(max_iter):
+            p = _sigmoid(Xs @ theta)
+            gradient = Xs.T @ (p - y) / len(y) + penalty * theta
+            w = p * (1 - p) / len(y)
+            hessian = (Xs * w[:, None]).T @ Xs + np.diag(penalty)
+            step = np.linalg.solve(hessian + 1e-9 * np.eye(len(theta)), gradient)
+            theta -= step
+            if np.max(np.abs(step)) < tol:
+                break
+
+        self.weights = theta[:-1]
+        self.bias = float(theta[-1])
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Incident probability per row, 0-1"""
+        if self.weights is None:
+            raise RuntimeError("Model has not been trained")
+        return _sigmoid(((X - self.mean) / self.scale) @ self.weights + self.bias)
+
+    def score_readings(self, readings: List[SensorReading]) -> np.ndarray:
+        """Batched inference straight from readings"""
+        return self.predict_proba(extract_features(readings, self.fuel_type))
+
+    def save(self, path: str):
+        np.savez(path, weights=self.weights, bias=self.bias, mean=self.mean, scale=self.scale,
+                 fuel_type=self.fuel_type.value, feature_names=np.array(FEATURE_NAMES))
+
+    @classmethod
+    def load(cls, path: str) -> "LogisticRiskModel":
+        data = np.load(path)
+        if list(data["feature_names"]) != FEATURE_NAMES:
+            raise ValueError("Saved model was trained on a different feature set")
+        model = cls(FuelType(str(data["fuel_type"])))
+        model.weights = data["weights"]
+        model.bias = float(data["bias"])
+        model.mean = data["mean"]
+        model.scale = data["scale"]
+        return model
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    # tanh form does not overflow for large |z|
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+def load_logged_readings(log_file: str) -> List[Tuple[str, SensorReading]]:
+    """Parse (device_id, reading) pairs from DataLogger output"""
+    entries = []
+    with open(log_file) as f:
+        for line in f:
+            if " - data_logger - " not in line:
+                continue
+            try:
+                entry = json.loads(line.split(" - ", 3)[3])
+            except (IndexError, ValueError):
+                continue
+            if "sensor_data" in entry:
+                entries.append((entry["device_id"], SensorReading(**entry["sensor_data"])))
+    return entries
+
+def label_readings(entries: List[Tuple[str, SensorReading]], incidents: List[IncidentLabel],
+                   lead_time_s: float = 300.0) -> np.ndarray:
+    """
+    1 for readings inside an incident window or up to lead_time_s before it, else 0
+    The lead time teaches the model the precursors, not just the incident itself
+    """
+    labels = np.zeros(len(entries))
+    by_device: Dict[str, List[IncidentLabel]] = {}
+    for incident in incidents:
+        by_device.setdefault(incident.device_id, []).append(incident)
+
+    for i, (device_id, reading) in enumerate(entries):
+        for incident in by_device.get(device_id, []):
+            if incident.start - lead_time_s <= reading.timestamp <= incident.end:
+                labels[i] = 1.0
+                break
+    return labels
+
+def train_from_logs(log_file: str, incidents: List[IncidentLabel],
+                    fuel_type: FuelType = FuelType.PETROL, lead_time_s: float = 300.0) -> LogisticRiskModel:
+    """Offline training entry point"""
+    entries = load_logged_readings(log_file)
+    X = extract_features([reading for _, reading in entries], fuel_type)
+    y = label_readings(entries, incidents, lead_time_s)
+    return LogisticRiskModel(fuel_type).fit(X, y)
+
+class ShadowRiskScorer:
+    """Runs the learned model next to the rule engine; the rule result is what gets acted on.
+    Each device gets its own engine so trend windows and forecasts never mix devices"""
+
+    def __init__(self, fuel_type: FuelType, model: LogisticRiskModel):
+        self.fuel_type = fuel_type
+        self.model = model
+        self.engines: Dict[str, RiskAssessmentEngine] = {}
+        self.logger = logging.getLogger("shadow_scorer")
+        self.compared = 0
+        self.disagreements = 0
+
+    def assess_risk(self, device_id: str, reading: SensorReading) -> RiskAssessment:
+        return self.assess_batch(device_id, [reading])[0]
+
+    def assess_batch(self, device_id: str, readings: List[SensorReading]) -> List[RiskAssessment]:
+        """Rule assessments in order, with one vectorized model pass for the whole batch"""
+        engine = self.engines.get(device_id)
+        if engine is None:
+            engine = RiskAssessmentEngine(self.fuel_type)
+            self.engines[device_id] = engine
+        assessments = [engine.assess_risk(reading) for reading in readings]
+        model_scores = self.model.score_readings(readings)
+
+        for reading, assessment, model_score in zip(readings, assessments, model_scores):
+            self._log_comparison(device_id, reading, assessment, float(model_score))
+        return assessments
+
+    def _log_comparison(self, device_id: str, reading: SensorReading,
+                        assessment: RiskAssessment, model_score: float):
+        self.compared += 1
+        # Disagreement: model is confident of an incident the rules call safe/low, or vice versa
+        rule_alarm = assessment.risk_score >= 0.6
+        model_alarm = model_score >= 0.5
+        if rule_alarm != model_alarm:
+            self.disagreements += 1
+
+        self.logger.info(json.dumps({
+            "device_id": device_id,
+            "timestamp": reading.timestamp,
+            "rule_score": assessment.risk_score,
+            "rule_level": assessment.risk_level.name,
+            "model_score": model_score,
+            "agree": rule_alarm == model_alarm
+        }))
+
+def demo_learned_model():
+    """Train on simulated history and compare against the rule engine in shadow mode"""
+    print("🧠 Learned Risk Model Demo")
+    print("=" * 40)
+
+    simulator = SensorSimulator(FuelType.PETROL)
+    scenarios = ["normal"] * 6 + ["gas_leak", "temperature_rise", "fire_event"]
+    readings, labels = [], []
+    for i in range(3000):
+        scenario = scenarios[i % len(scenarios)]
+        readings.append(simulator.generate_reading(scenario))
+        labels.append(0.0 if scenario == "normal" else 1.0)
+
+    model = LogisticRiskModel(FuelType.PETROL).fit(extract_features(readings), np.array(labels))
+    accuracy = np.mean((model.score_readings(readings) >= 0.5) == np.array(labels, dtype=bool))
+    print(f"Training accuracy: {accuracy:.3f}")
+
+    batch = [simulator.generate_reading("normal") for _ in range(10000)]
+    start = time.perf_counter()
+    model.score_readings(batch)
+    elapsed = time.perf_counter() - start
+    print(f"Batched inference: {elapsed / len(batch) * 1e6:.2f} µs per reading")
+
+    scorer = ShadowRiskScorer(FuelType.PETROL, model)
+    for scenario in ["normal", "gas_leak", "fire_event"]:
+        reading = simulator.generate_reading(scenario)
+        assessment = scorer.assess_risk("TANK_A_001", reading)
+        model_score = model.score_readings([reading])[0]
+        print(f"{scenario:>10}: rule {assessment.risk_score:.3f} ({assessment.risk_level.name}), "
+              f"model {model_score:.3f}")
+
+if __name__ == "__main__":
+    demo_learned_model()
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+LoRa Telemetry Codec
+Compact binary frames for CommunicationChannel.LORA: SensorReading fields are quantized to
+the sensor ranges in the LLD (§2.2, §4.2), bit-packed into keyframes, and delta-encoded
+against the last reading the ingest side acknowledged. Every frame fits the 51-byte
+LoRaWAN payload limit at the slowest data rate. Includes a local radio stand-in with
+airtime, duty-cycle and loss limits.
+
+Frame layout (device identity comes from the LoRaWAN network layer, not the payload):
+    keyframe: header, seq, type/level, battery, timestamp ms (6), lat, lon (int32 1e-7 deg),
+              bit-packed sensor fields
+    delta:    header, seq, ref seq, type/level, changed-field bitmap (2),
+              zigzag varints for timestamp and each changed field
+"""
+
+import math
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from risk_assessment_engine import RiskLevel, SensorReading
+
+MAX_FRAME_BYTES = 51          # LoRaWAN EU868 DR0 / US915 DR0 application payload
+LORAWAN_OVERHEAD_BYTES = 13   # MHDR + FHDR + FPort + MIC, counted for airtime
+PROTOCOL_VERSION = 1
+KEYFRAME = 0
+DELTA = 1
+SEQ_MODULO = 256
+MAX_REFERENCE_AGE = 32        # Older references force a keyframe; decoder keeps twice this
+MAX_UNACKED_DELTAS = 2        # Consecutive unacked deltas before falling back to keyframes (ingest may have lost the reference)
+
+# (field, scale, minimum, maximum): stored as round((value - minimum) * scale), saturating
+SENSOR_FIELDS = [
+    ("gas_lpg_ppm", 1, 0, 100000),
+    ("gas_smoke_ppm", 1, 0, 10000),
+    ("temperature_c", 10, -40, 125),        # SHT30 range, 0.1 °C
+    ("humidity_rh", 2, 0, 100),             # 0.5 % RH
+    ("flame_ir_raw", 1, 0, 1023),           # 10-bit ADC
+    ("flame_uv_raw", 1, 0, 1023),
+    ("flame_detected", 1, 0, 1),
+    ("wind_speed_mps", 10, 0, 25.5),        # 0.1 m/s
+    ("wind_direction_deg", 1, 0, 359),
+    ("barometric_pressure_hpa", 10, 870, 1085),
+    ("data_quality", 1, 0, 100),
+    ("fault_flags", 1, 0, 31),
+]
+FIELD_BITS = [int(round((maximum - minimum) * scale)).bit_length() for _, scale, minimum, maximum in SENSOR_FIELDS]
+SENSOR_BYTES = (sum(FIELD_BITS) + 7) // 8
+WIND_DIRECTION = [name for name, _, _, _ in SENSOR_FIELDS].index("wind_direction_deg")
+# Delta bitmap: one bit per sensor field, then battery
+BATTERY_BIT = len(SENSOR_FIELDS)
+
+def quantize(reading: SensorReading) -> Tuple[int, ...]:
+    values = []
+    for name, scale, minimum, maximum in SENSOR_FIELDS:
+        top = int(round((maximum - minimum) * scale))
+        values.append(min(top, max(0, int(round((float(getattr(reading, name)) - minimum) * scale)))))
+    return tuple(values)
+
+def dequantize(values: Tuple[int, ...], timestamp: float) -> SensorReading:
+    fields = {}
+    for (name, scale, minimum, _), value in zip(SENSOR_FIELDS, values):
+        kind = SensorReading.__annotations__[name]
+        fields[name] = kind(value + minimum) if kind in (int, bool) else round(value / scale + minimum, 3)
+    return SensorReading(timestamp=timestamp, **fields)
+
+def _pack_sensor(values: Tuple[int, ...]) -> bytes:
+    packed = 0
+    for value, bits in zip(values, FIELD_BITS):
+        packed = (packed << bits) | value
+    return (packed << (SENSOR_BYTES * 8 - sum(FIELD_BITS))).to_bytes(SENSOR_BYTES, "big")
+
+def _unpack_sensor(data: bytes) -> Tuple[int, ...]:
+    packed = int.from_bytes(data, "big") >> (SENSOR_BYTES * 8 - sum(FIELD_BITS))
+    values = []
+    for bits in reversed(FIELD_BITS):
+        values.append(packed & ((1 << bits) - 1))
+        packed >>= bits
+    return tuple(reversed(values))
+
+def _write_varint(out: bytearray, value: int):
+    """Zigzag + LEB128, so small deltas of either sign take one byte"""
+    value = (value << 1) ^ (value >> 63)
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Truncated varint in LoRa frame")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return (value >> 1) ^ -(value & 1), pos
+
+def _type_level(message) -> int:
+    from communication_system import MessageType
+
+    return list(MessageType).index(message.message_type) << 3 | message.risk_level.value
+
+@dataclass
+class _FrameState:
+    """What the ingest side reconstructs from one frame; delta references point at these"""
+    timestamp_ms: int
+    sensor: Optional[Tuple[int, ...]]
+    battery: int
+    gps: Tuple[int, int]
+
+@dataclass
+class _EncoderDevice:
+    next_seq: int = 0
+    reference: Optional[Tuple[int, _FrameState]] = None   # (seq, state) last acknowledged
+    in_flight: Dict[int, _FrameState] = field(default_factory=dict)
+    unacked_deltas: int = 0   # Deltas sent since the reference was last advanced
+    last_message_id: str = ""
+    last_acknowledged: bool = False
+
+class LoRaFrameEncoder:
+    """Device side: keyframes until the ingest side acknowledges one, then the smaller of delta or keyframe"""
+
+    def __init__(self, keyframe_every: int = 64):
+        self.keyframe_every = keyframe_every  # Periodic resync even when acks keep arriving
+        self.devices: Dict[str, _EncoderDevice] = {}
+        self.keyframes = 0
+        self.deltas = 0
+
+    def encode(self, message) -> Tuple[int, bytes]:
+        """Returns (seq, frame)"""
+        device = self.devices.setdefault(message.device_id, _EncoderDevice())
+        seq = device.next_seq
+        device.next_seq = (seq + 1) % SEQ_MODULO
+        state = _FrameState(
+            timestamp_ms=int(round(message.timestamp * 1000)),
+            sensor=quantize(message.sensor_data) if message.sensor_data else None,
+            battery=max(0, min(100, int(message.battery_level))),
+            gps=(int(round(message.gps_lat * 1e7)), int(round(message.gps_lon * 1e7))),
+        )
+
+        frame = self._keyframe(seq, message, state)
+        if device.reference is not None and state.sensor is not None:
+            ref_seq, ref_state = device.reference
+            age = (seq - ref_seq) % SEQ_MODULO
+            if (ref_state.sensor is not None and ref_state.gps == state.gps and age <= MAX_REFERENCE_AGE
+                    and device.unacked_deltas < MAX_UNACKED_DELTAS and not (self.keyframe_every and seq % self.keyframe_every == 0)):
+                delta = self._delta(seq, ref_seq, ref_state, message, state)
+                if len(delta) < len(frame):
+                    frame = delta
+        if (frame[0] >> 4) & 0x3 == DELTA:
+            self.deltas += 1
+            device.unacked_deltas += 1
+        else:
+            self.keyframes += 1
+
+        # Forget frames too old to become a reference
+        device.in_flight = {s: st for s, st in device.in_flight.items() if (seq - s) % SEQ_MODULO < MAX_REFERENCE_AGE}
+        device.in_flight[seq] = state
+        assert len(frame) <= MAX_FRAME_BYTES
+        return seq, frame
+
+    @staticmethod
+    def _keyframe(seq: int, message, state: _FrameState) -> bytes:
+        header = PROTOCOL_VERSION << 6 | KEYFRAME << 4 | (1 if state.sensor is not None else 0)
+        frame = bytearray([header, seq, _type_level(message), state.battery])
+        frame += state.timestamp_ms.to_bytes(6, "big")
+        frame += state.gps[0].to_bytes(4, "big", signed=True) + state.gps[1].to_bytes(4, "big", signed=True)
+        if state.sensor is not None:
+            frame += _pack_sensor(state.sensor)
+        return bytes(frame)
+
+    @staticmethod
+    def _delta(seq: int, ref_seq: int, ref: _FrameState, message, state: _FrameState) -> bytes:
+        header = PROTOCOL_VERSION << 6 | DELTA << 4 | 1
+        bitmap = 0
+        body = bytearray()
+        _write_varint(body, state.timestamp_ms - ref.timestamp_ms)
+        for i, (value, ref_value) in enumerate(zip(state.sensor, ref.sensor)):
+            diff = value - ref_value
+            if i == WIND_DIRECTION:
+                diff = (diff + 180) % 360 - 180  # 359 -> 1 is +2, not -358
+            if diff:
+                bitmap |= 1 << i
+                _write_varint(body, diff)
+        if state.battery != ref.battery:
+            bitmap |= 1 << BATTERY_BIT
+            _write_varint(body, state.battery - ref.battery)
+        return bytes([header, seq, ref_seq, _type_level(message)]) + bitmap.to_bytes(2, "big") + bytes(body)
+
+    def acknowledge(self, device_id: str, seq: int):
+        """Ingest side confirmed it decoded `seq`; it becomes the delta reference if newer"""
+        device = self.devices.get(device_id)
+        if device is None or seq not in device.in_flight:
+            return
+        if device.reference is not None:
+            newest = (device.next_seq - 1) % SEQ_MODULO
+            if (newest - seq) % SEQ_MODULO > (newest - device.reference[0]) % SEQ_MODULO:
+                return  # Late ack for a frame older than the current reference
+        device.reference = (seq, device.in_flight.pop(seq))
+        device.unacked_deltas = 0
+
+class LoRaFrameDecoder:
+    """Ingest side: rebuilds DeviceMessages and returns the seq to acknowledge"""
+
+    def __init__(self, window: int = 2 * MAX_REFERENCE_AGE,
+                 on_message: Optional[Callable[[object], None]] = None):
+        self.window = window
+        self.on_message = on_message
+        self.devices: Dict[str, "OrderedDict[int, _FrameState]"] = {}
+
+    def decode(self, device_id: str, frame: bytes, signal_strength: int = 0):
+        """Returns (DeviceMessage, seq); LookupError if a delta's reference was never received"""
+        from communication_system import DeviceMessage, MessageType
+
+        if len(frame) < 4 or frame[0] >> 6 != PROTOCOL_VERSION:
+            raise ValueError(f"Not a LoRa telemetry frame from {device_id}")
+        kind = (frame[0] >> 4) & 0x3
+        seq = frame[1]
+        received = self.devices.setdefault(device_id, OrderedDict())
+
+        if kind == KEYFRAME:
+            type_level, battery = frame[2], frame[3]
+            has_sensor = frame[0] & 1
+            if len(frame) != 18 + (SENSOR_BYTES if has_sensor else 0):
+                raise ValueError(f"Bad keyframe length {len(frame)} from {device_id}")
+            state = _FrameState(
+                timestamp_ms=int.from_bytes(frame[4:10], "big"),
+                sensor=_unpack_sensor(frame[18:]) if has_sensor else None,
+                battery=battery,
+                gps=(int.from_bytes(frame[10:14], "big", signed=True),
+                     int.from_bytes(frame[14:18], "big", signed=True)),
+            )
+        elif kind == DELTA:
+            ref_seq, type_level = frame[2], frame[3]
+            ref = received.get(ref_seq)
+            if ref is None or ref.sensor is None:
+                raise LookupError(f"Delta frame {seq} from {device_id} references unknown frame {ref_seq}")
+            bitmap = int.from_bytes(frame[4:6], "big")
+            diff, pos = _read_varint(frame, 6)
+            timestamp_ms = ref.timestamp_ms + diff
+            sensor = list(ref.sensor)
+            for i in range(len(SENSOR_FIELDS)):
+                if bitmap >> i & 1:
+                    diff, pos = _read_varint(frame, pos)
+                    sensor[i] += diff
+                    if i == WIND_DIRECTION:
+                        sensor[i] %= 360
+            battery = ref.battery
+            if bitmap >> BATTERY_BIT & 1:
+                diff, pos = _read_varint(frame, pos)
+                battery += diff
+            if pos != len(frame):
+                raise ValueError(f"Trailing bytes in delta frame {seq} from {device_id}")
+            state = _FrameState(timestamp_ms, tuple(sensor), battery, ref.gps)
+        else:
+            raise ValueError(f"Unknown LoRa frame kind {kind} from {device_id}")
+
+        received.pop(seq, None)
+        received[seq] = state
+        while len(received) > self.window:
+            received.popitem(last=False)
+
+        timestamp = state.timestamp_ms / 1000
+        message = DeviceMessage(
+            device_id=device_id,
+            timestamp=timestamp,
+            message_type=list(MessageType)[type_level >> 3],
+            risk_level=RiskLevel(type_level & 0x7),
+            sensor_data=dequantize(state.sensor, timestamp) if state.sensor is not None else None,
+            risk_assessment=None,  # Recomputed at ingest; factor text does not fit a LoRa frame
+            battery_level=state.battery,
+            signal_strength=signal_strength,
+            gps_lat=state.gps[0] / 1e7,
+            gps_lon=state.gps[1] / 1e7,
+            message_id=""
+        )
+        return message, seq
+
+    def receive(self, device_id: str, frame: bytes) -> Optional[int]:
+        """Gateway callback for SimulatedLoRaRadio: decode, hand off, and return the ack"""
+        try:
+            message, seq = self.decode(device_id, frame)
+        except LookupError:
+            return None  # No ack; after MAX_UNACKED_DELTAS of these the device falls back to keyframes
+        if self.on_message:
+            self.on_message(message)
+        return seq
+
+class DutyCycleExceeded(RuntimeError):
+    """The radio must stay silent until its duty-cycle budget recovers"""
+
+class SimulatedLoRaRadio:
+    """Local stand-in for end-device radios and a gateway: airtime, per-device duty cycle, loss"""
+
+    def __init__(self, receiver: Callable[[str, bytes], Optional[int]], spreading_factor: int = 9,
+                 bandwidth_hz: int = 125_000, coding_rate: int = 1, duty_cycle: float = 0.01,
+                 uplink_loss: float = 0.0, downlink_loss: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic, seed: int = 0):
+        self.receiver = receiver
+        self.spreading_factor = spreading_factor
+        self.bandwidth_hz = bandwidth_hz
+        self.coding_rate = coding_rate  # 1..4 for 4/5..4/8
+        self.duty_cycle = duty_cycle
+        self.uplink_loss = uplink_loss
+        self.downlink_loss = downlink_loss
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.next_allowed: Dict[str, float] = {}
+        self.frames = 0
+        self.payload_bytes = 0
+        self.airtime_total_s = 0.0
+        self.lost = 0
+
+    def airtime_s(self, payload_bytes: int) -> float:
+        """Semtech SX127x time-on-air, explicit header, CRC on, 8-symbol preamble"""
+        sf = self.spreading_factor
+        symbol_s = (2 ** sf) / self.bandwidth_hz
+        low_rate_optimize = 1 if symbol_s > 0.016 else 0
+        length = payload_bytes + LORAWAN_OVERHEAD_BYTES
+        symbols = 8 + max(math.ceil((8 * length - 4 * sf + 28 + 16) / (4 * (sf - 2 * low_rate_optimize)))
+                          * (self.coding_rate + 4), 0)
+        return (8 + 4.25) * symbol_s + symbols * symbol_s
+
+    def transmit(self, device_id: str, frame: bytes) -> Optional[int]:
+        """Send one uplink; returns the downlink ack seq, or None if either direction was lost"""
+        if len(frame) > MAX_FRAME_BYTES:
+            raise ValueError(f"LoRa frame is {len(frame)} bytes, limit {MAX_FRAME_BYTES}")
+        now = self.clock()
+        wait = self.next_allowed.get(device_id, 0.0) - now
+        if wait > 0:
+            raise DutyCycleExceeded(f"{device_id} must wait {wait:.1f} s ({self.duty_cycle:.0%} duty cycle)")
+
+        airtime = self.airtime_s(len(frame))
+        self.next_allowed[device_id] = now + airtime / self.duty_cycle
+        self.frames += 1
+        self.payload_bytes += len(frame)
+        self.airtime_total_s += airtime
+
+        if self.rng.random() < self.uplink_loss:
+            self.lost += 1
+            return None
+        ack = self.receiver(device_id, frame)
+        if ack is None or self.rng.random() < self.downlink_loss:
+            return None
+        return ack
+
+class LoRaLink:
+    """Device side of CommunicationChannel.LORA: one frame per message, acks advance the delta reference"""
+
+    def __init__(self, radio: SimulatedLoRaRadio, encoder: Optional[LoRaFrameEncoder] = None):
+        self.radio = radio
+        self.encoder = encoder or LoRaFrameEncoder()
+
+    def send(self, message) -> bool:
+        """Returns True if acknowledged; raises DutyCycleExceeded when the radio must stay silent"""
+        device = self.encoder.devices.get(message.device_id)
+        if device is not None and device.last_message_id == message.message_id and device.last_acknowledged:
+            return True  # Already delivered for another contact; LoRa uplinks are not per recipient
+        wait = self.radio.next_allowed.get(message.device_id, 0.0) - self.radio.clock()
+        if wait > 0:
+            raise DutyCycleExceeded(f"{message.device_id} must wait {wait:.1f} s")
+
+        seq, frame = self.encoder.encode(message)
+        device = self.encoder.devices[message.device_id]
+        device.last_message_id = message.message_id
+        ack = self.radio.transmit(message.device_id, frame)
+        if ack is not None:
+            self.encoder.acknowledge(message.device_id, ack)
+        device.last_acknowledged = ack is not None
+        return device.last_acknowledged
+
+def demo_lora_codec():
+    """Encode a simulated stream and compare frame sizes with the JSON payload"""
+    from communication_system import DeviceMessage, MessageFormatter, MessageType
+    from risk_assessment_engine import SensorSimulator, FuelType
+
+    print("📶 LoRa Codec Demo")
+    print("=" * 40)
+
+    simulator = SensorSimulator(FuelType.PETROL)
+    decoder = LoRaFrameDecoder()
+    clock = [0.0]
+    radio = SimulatedLoRaRadio(decoder.receive, clock=lambda: clock[0])
+    link = LoRaLink(radio)
+
+    json_bytes = 0
+    reading = simulator.generate_reading("normal")
+    for i in range(20):
+        clock[0] += 60.0
+        reading.timestamp += 60.0
+        reading.temperature_c += random.uniform(-0.2, 0.2)
+        reading.gas_lpg_ppm = max(0.0, reading.gas_lpg_ppm + random.uniform(-2, 2))
+        message = DeviceMessage("TANK_A_001", reading.timestamp, MessageType.SENSOR_DATA, RiskLevel.SAFE,
+                                reading, None, 85, 78, -17.8216, 31.0492, "")
+        link.send(message)
+        json_bytes += len(MessageFormatter.format_json_payload(message))
+
+    print(f"Frames: {radio.frames} ({link.encoder.keyframes} keyframes, {link.encoder.deltas} deltas)")
+    print(f"Bytes per reading: {radio.payload_bytes / radio.frames:.1f} LoRa vs {json_bytes / radio.frames:.0f} JSON")
+    print(f"Airtime per reading: {radio.airtime_total_s / radio.frames * 1000:.0f} ms at SF{radio.spreading_factor}")
+
+if __name__ == "__main__":
+    demo_lora_codec()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Partitioned Multi-Node Deployment
+Consistent-hashes device_id to ingest/assessment nodes and hands per-device state
+(trend window, forecaster, pending escalations) to the new owner when nodes join or leave
+"""
+
+import bisect
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from risk_assessment_engine import RiskAssessment, RiskAssessmentEngine, SensorReading, FuelType
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+class ConsistentHashRing:
+    """Hash ring with virtual nodes; adding or removing a node only moves ~1/N of the keys"""
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 128):
+        self.virtual_nodes = virtual_nodes
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self._nodes = set()
+        for node_id in nodes:
+            self.add_node(node_id)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def add_node(self, node_id: str):
+        if node_id in self._nodes:
+            return
+        self._nodes.add(node_id)
+        for i in range(self.virtual_nodes):
+            point = _hash(f"{node_id}#{i}")
+            self._owners[point] = node_id
+            bisect.insort(self._points, point)
+
+    def remove_node(self, node_id: str):
+        if node_id not in self._nodes:
+            return
+        self._nodes.discard(node_id)
+        for i in range(self.virtual_nodes):
+            point = _hash(f"{node_id}#{i}")
+            del self._owners[point]
+            self._points.remove(point)
+
+    def node_for(self, key: str) -> str:
+        """Owner of a key: first virtual node clockwise from the key's hash"""
+        if not self._points:
+            raise LookupError("Hash ring has no nodes")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+@dataclass
+class DeviceHandoff:
+    """Everything a node needs to continue serving a set of devices"""
+    engines: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    escalations: list = field(default_factory=list)  # communication_system.PendingEscalation
+
+class AssessmentNode:
+    """One ingest/assessment node holding an engine per owned device"""
+
+    def __init__(self, node_id: str, fuel_type: FuelType = FuelType.PETROL, comm_manager=None,
+                 plume_models: Optional[Dict[str, object]] = None):
+        self.node_id = node_id
+        self.fuel_type = fuel_type
+        self.comm_manager = comm_manager
+        # site_id -> plume_dispersion.GaussianPlumeModel shared by the plume-mode engines at that site
+        self.plume_models = plume_models or {}
+        self.engines: Dict[str, RiskAssessmentEngine] = {}
+
+    def assess(self, device_id: str, reading: SensorReading) -> RiskAssessment:
+        engine = self.engines.get(device_id)
+        if engine is None:
+            engine = RiskAssessmentEngine(self.fuel_type)
+            self.engines[device_id] = engine
+        return engine.assess_risk(reading)
+
+    def export_devices(self, device_ids: Iterable[str]) -> DeviceHandoff:
+        """Release devices: their state is removed locally and returned for the new owner"""
+        device_ids = list(device_ids)
+        handoff = DeviceHandoff()
+        for device_id in device_ids:
+            engine = self.engines.pop(device_id, None)
+            if engine is not None:
+                handoff.engines[device_id] = engine.export_state()
+        if self.comm_manager is not None:
+            handoff.escalations = self.comm_manager.export_escalations(device_ids)
+        return handoff
+
+    def _plume_model_for(self, dispersion_mode: str, site_id: str):
+        if dispersion_mode != "plume":
+            return None
+        model = self.plume_models.get(site_id)
+        if model is None and site_id != "default":
+            raise ValueError(f"Node {self.node_id} has no plume model for site {site_id}")
+        return model
+
+    def check_devices(self, engines: Iterable[RiskAssessmentEngine]):
+        """Raise if this node could not rebuild these engines; call before their owner releases them"""
+        for engine in engines:
+            self._plume_model_for(engine.dispersion_mode, engine.site_id)
+
+    def import_devices(self, handoff: DeviceHandoff):
+        # Rebuild every engine before adopting any, so a bad state leaves this node unchanged
+        engines = {}
+        for device_id, state in handoff.engines.items():
+            plume_model = self._plume_model_for(state["dispersion_mode"], state.get("site_id", "default"))
+            engines[device_id] = RiskAssessmentEngine.from_state(state, plume_model=plume_model)
+        self.engines.update(engines)
+        if handoff.escalations:
+            if self.comm_manager is None:
+                raise RuntimeError(f"Node {self.node_id} cannot accept escalations without a CommunicationManager")
+            self.comm_manager.import_escalations(handoff.escalations)
+
+class PartitionedCluster:
+    """Routes readings to the owning node and rebalances device state on membership changes"""
+
+    def __init__(self, virtual_nodes: int = 128):
+        self.ring = ConsistentHashRing(virtual_nodes=virtual_nodes)
+        self.nodes: Dict[str, AssessmentNode] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def owner(self, device_id: str) -> AssessmentNode:
+        return self.nodes[self.ring.node_for(device_id)]
+
+    def assess(self, device_id: str, reading: SensorReading) -> RiskAssessment:
+        return self.owner(device_id).assess(device_id, reading)
+
+    def add_node(self, node: AssessmentNode) -> int:
+        """Join a node; devices that now hash to it are handed over. Returns devices moved"""
+        self.ring.add_node(node.node_id)
+        handoffs: Dict[str, set] = {}
+        for other in self.nodes.values():
+            leaving = {d for d in other.engines if self.ring.node_for(d) == node.node_id}
+            if other.comm_manager is not None:
+                leaving |= {p.message.device_id for p in other.comm_manager.pending_escalations.values()
+                            if self.ring.node_for(p.message.device_id) == node.node_id}
+            if leaving:
+                handoffs[other.node_id] = leaving
+        try:
+            for other_id, leaving in handoffs.items():
+                engines = self.nodes[other_id].engines
+                node.check_devices(engines[d] for d in leaving if d in engines)
+        except ValueError:
+            self.ring.remove_node(node.node_id)  # Nothing has moved yet
+            raise
+
+        self.nodes[node.node_id] = node
+        moved = 0
+        for other_id, leaving in handoffs.items():
+            node.import_devices(self.nodes[other_id].export_devices(leaving))
+            moved += len(leaving)
+
+        self.logger.info(f"Node {node.node_id} joined, {moved} devices handed over")
+        return moved
+
+    def remove_node(self, node_id: str) -> int:
+        """Leave gracefully; every device the node held goes to its new owner. Returns devices moved"""
+        node = self.nodes[node_id]
+        device_ids = set(node.engines)
+        if node.comm_manager is not None:
+            device_ids |= {p.message.device_id for p in node.comm_manager.pending_escalations.values()}
+        if device_ids and len(self.nodes) == 1:
+            raise RuntimeError("Cannot remove the last node while it still holds devices")
+
+        self.ring.remove_node(node_id)
+        by_owner: Dict[str, List[str]] = {}
+        for device_id in device_ids:
+            by_owner.setdefault(self.ring.node_for(device_id), []).append(device_id)
+        try:
+            for owner_id, owned in by_owner.items():
+                self.nodes[owner_id].check_devices(node.engines[d] for d in owned if d in node.engines)
+        except ValueError:
+            self.ring.add_node(node_id)  # Nothing has moved yet; the node keeps serving its devices
+            raise
+
+        del self.nodes[node_id]
+        for owner_id, owned in by_owner.items():
+            self.nodes[owner_id].import_devices(node.export_devices(owned))
+
+        self.logger.info(f"Node {node_id} left, {len(device_ids)} devices handed over")
+        return len(device_ids)
+
+    def distribution(self) -> Dict[str, int]:
+        """Devices currently held per node"""
+        return {node_id: len(node.engines) for node_id, node in self.nodes.items()}
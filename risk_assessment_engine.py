@@ -2,6 +2,7 @@
 """
 Fire Hazard Risk Assessment Engine
 This is the "brain" of the system and can be fully developed and tested without hardware, with simulated/mock sensor data
+The scalar scoring path is pure Python; NumPy is only loaded by the optional backends (e.g. plume dispersion)
 """
 
 import json
@@ -9,9 +10,8 @@ import time
 import math
 import random
 from dataclasses import dataclass, asdict
-from typing import List, Tuple, Optional
-from enum import Enum
-import numpy as np
+from typing import Dict, List, Tuple, Optional
+from enum import Enum, IntFlag
 from collections import deque
 
 class RiskLevel(Enum):
@@ -27,6 +27,15 @@ class FuelType(Enum):
     ETHANOL = "ethanol"
     JET_A1 = "jet_a1"
 
+class SensorFault(IntFlag):
+    """Data quality fault flags attached to a reading by data_quality.DataQualityPipeline"""
+    NONE = 0
+    STUCK = 1            # Sensor output frozen
+    SPIKE = 2            # Hampel outlier, replaced by window median
+    RATE_OF_CHANGE = 4   # Physically implausible jump, replaced by window median
+    GAP = 8              # Missing value, interpolated
+    OUT_OF_RANGE = 16    # Outside sensor range, treated as missing
+
 @dataclass
 class SensorReading:
     timestamp: float
@@ -41,6 +50,19 @@ class SensorReading:
     wind_direction_deg: int
     barometric_pressure_hpa: float
     data_quality: int  # 0-100%
+    fault_flags: int = 0  # SensorFault bits
+
+@dataclass
+class ThresholdForecast:
+    """Smoothed level, trend and estimated seconds until the critical thresholds are reached"""
+    gas_ppm: float
+    gas_rate_ppm_s: float
+    gas_eta_s: Optional[float]  # None = not approaching the threshold
+    temperature_c: float
+    temp_rate_c_s: float
+    temp_eta_s: Optional[float]
+    gas_breach_readings: int = 0   # Consecutive readings forecasting a breach within the horizon
+    temp_breach_readings: int = 0
 
 @dataclass
 class RiskAssessment:
@@ -50,6 +72,7 @@ class RiskAssessment:
     recommended_actions: List[str]
     confidence: float
     timestamp: float
+    forecast: Optional[ThresholdForecast] = None
 
 class FuelProperties:
     """Fuel-specific properties for risk assessment"""
@@ -89,6 +112,15 @@ class FuelProperties:
         }
     }
 
+def _linear_slope(values: List[float]) -> float:
+    """Least-squares slope against the sample index (same result as a degree-1 polyfit)"""
+    n = len(values)
+    x_mean = (n - 1) / 2
+    y_mean = sum(values) / n
+    numerator = sum((x - x_mean) * (y - y_mean) for x, y in enumerate(values))
+    denominator = sum((x - x_mean) ** 2 for x in range(n))
+    return numerator / denominator
+
 class TrendAnalyzer:
     """Analyzes trends in sensor data for predictive risk assessment"""
     
@@ -108,8 +140,8 @@ class TrendAnalyzer:
         recent_gas = [r.gas_lpg_ppm for r in list(self.history)[-5:]]
         older_gas = [r.gas_lpg_ppm for r in list(self.history)[-10:-5]] if len(self.history) >= 10 else recent_gas
         
-        recent_avg = np.mean(recent_gas)
-        older_avg = np.mean(older_gas)
+        recent_avg = sum(recent_gas) / len(recent_gas)
+        older_avg = sum(older_gas) / len(older_gas)
         
         if older_avg == 0:
             return 1.0
@@ -118,15 +150,139 @@ class TrendAnalyzer:
         
         # Calculate temperature trend
         recent_temps = [r.temperature_c for r in list(self.history)[-5:]]
-        temp_slope = np.polyfit(range(len(recent_temps)), recent_temps, 1)[0] if len(recent_temps) > 1 else 0
+        temp_slope = _linear_slope(recent_temps) if len(recent_temps) > 1 else 0
         
         # Combine gas and temperature trends
         trend_factor = trend_ratio + (temp_slope * 0.1)
         return max(0.5, min(3.0, trend_factor))  # Clamp between 0.5 and 3.0
 
+class HoltForecaster:
+    """Holt linear (level + trend) smoothing for irregularly spaced samples, O(1) per update"""
+    
+    def __init__(self, alpha: float = 0.5, beta: float = 0.2, min_samples: int = 5, min_trend_z: float = 3.0,
+                 trend_window_s: float = 60.0, min_history_s: float = 10.0):
+        self.alpha = alpha
+        self.beta = beta
+        self.min_samples = min_samples
+        self.min_trend_z = min_trend_z  # Rise must exceed this many standard errors to forecast
+        self.trend_window_s = trend_window_s  # Time constant of the regression that tests the rise
+        self.min_history_s = min_history_s  # A second of 10 Hz data says little about the next five minutes
+        self.level: Optional[float] = None
+        self.trend = 0.0  # units per second
+        self.first_time = 0.0
+        self.last_time = 0.0
+        self.samples = 0
+        # Exponentially weighted sums for a least-squares line through the raw samples,
+        # with time measured back from the latest sample
+        self._w = self._w2 = self._t = self._tt = self._v = self._tv = self._vv = 0.0
+    
+    def update(self, timestamp: float, value: float):
+        if self.level is None:
+            self.level = value
+            self.first_time = self.last_time = timestamp
+            self.samples = 1
+        else:
+            dt = max(timestamp - self.last_time, 1e-3)
+            predicted = self.level + self.trend * dt
+            new_level = self.alpha * value + (1 - self.alpha) * predicted
+            slope = (new_level - self.level) / dt
+            self.trend = self.beta * slope + (1 - self.beta) * self.trend
+            self.level = new_level
+            self.last_time = timestamp
+            self.samples += 1
+
+            # Move the time origin to the new sample, then age every weight
+            decay = math.exp(-dt / self.trend_window_s)
+            self._tt = (self._tt - 2 * dt * self._t + dt * dt * self._w) * decay
+            self._t = (self._t - dt * self._w) * decay
+            self._tv = (self._tv - dt * self._v) * decay
+            self._w *= decay
+            self._w2 *= decay * decay
+            self._v *= decay
+            self._vv *= decay
+        self._w += 1.0
+        self._w2 += 1.0
+        self._v += value
+        self._vv += value * value
+    
+    def window_trend(self) -> Tuple[float, float, float]:
+        """
+        (slope, standard error, degrees of freedom) of the least-squares line over the trend window.
+        The error is the residual variance around the line divided by the samples' spread in time,
+        so it does not grow with the sample rate
+        """
+        sxx = self._tt - self._t * self._t / self._w if self._w else 0.0
+        effective = self._w * self._w / self._w2 if self._w2 else 0.0  # Kish effective sample size
+        if sxx <= 0 or effective <= 2:
+            return 0.0, math.inf, 0.0
+        sxy = self._tv - self._t * self._v / self._w
+        syy = self._vv - self._v * self._v / self._w
+        slope = sxy / sxx
+        residual_var = max(syy - slope * sxy, 0.0) / self._w * effective / (effective - 2)
+        return slope, math.sqrt(residual_var / (sxx * effective / self._w)), effective - 2
+    
+    def time_to_reach(self, threshold: float) -> Optional[float]:
+        """
+        Seconds until the trend crosses threshold, 0.0 if already above, None if not approaching
+        A rise within min_trend_z standard errors of zero over the trend window is noise, not an approach
+        """
+        if self.level is None or self.samples < self.min_samples:
+            return None
+        if self.level >= threshold:
+            return 0.0
+        if self.trend <= 0 or self.last_time - self.first_time < self.min_history_s:
+            return None
+        slope, stderr, dof = self.window_trend()
+        # Student-t critical value from the normal one: few samples need a larger margin
+        z = self.min_trend_z
+        if dof <= 0 or slope <= (z + (z ** 3 + z) / (4 * dof)) * stderr:
+            return None
+        return (threshold - self.level) / self.trend
+
+class ThresholdForecaster:
+    """Per-device gas and temperature forecasts against the engine's critical thresholds"""
+    
+    def __init__(self):
+        self.gas = HoltForecaster()
+        self.temperature = HoltForecaster()
+        self.gas_breach_readings = 0
+        self.temp_breach_readings = 0
+    
+    def add_reading(self, reading: SensorReading):
+        # Same gas measure the engine scores against its thresholds
+        self.gas.update(reading.timestamp, max(reading.gas_lpg_ppm, reading.gas_smoke_ppm))
+        self.temperature.update(reading.timestamp, reading.temperature_c)
+    
+    def forecast(self, thresholds: Dict[str, float]) -> Optional[ThresholdForecast]:
+        """Forecast against the engine's current thresholds; call once per reading"""
+        if self.gas.level is None:
+            return None
+        horizon = thresholds["forecast_horizon_s"]
+        gas_eta = self.gas.time_to_reach(thresholds["gas_critical_ppm"])
+        temp_eta = self.temperature.time_to_reach(thresholds["temp_critical_c"])
+        self.gas_breach_readings = self.gas_breach_readings + 1 if _within(gas_eta, horizon) else 0
+        self.temp_breach_readings = self.temp_breach_readings + 1 if _within(temp_eta, horizon) else 0
+        return ThresholdForecast(
+            gas_ppm=self.gas.level,
+            gas_rate_ppm_s=self.gas.trend,
+            gas_eta_s=gas_eta,
+            temperature_c=self.temperature.level,
+            temp_rate_c_s=self.temperature.trend,
+            temp_eta_s=temp_eta,
+            gas_breach_readings=self.gas_breach_readings,
+            temp_breach_readings=self.temp_breach_readings
+        )
+
+def _within(eta: Optional[float], horizon: float) -> bool:
+    return eta is not None and 0 < eta <= horizon
+
 class WeatherImpactCalculator:
     """Calculates weather impact on vapor dispersion and fire risk"""
     
+    def __init__(self, plume_model=None):
+        # Optional plume_dispersion.GaussianPlumeModel, None = threshold model
+        self.plume_model = plume_model
+    
     @staticmethod
     def calculate_dispersion_factor(wind_speed: float, wind_direction: int, 
                                   temperature: float, humidity: float, 
@@ -155,15 +311,56 @@ class WeatherImpactCalculator:
         humidity_factor = 1.0 - (humidity - 50) * 0.002 if humidity > 50 else 1.0
         
         return wind_factor * inversion_factor * humidity_factor
+    
+    def calculate_plume_dispersion_factor(self, wind_speed: float, wind_direction: int,
+                                          temperature: float, humidity: float,
+                                          pressure: float, timestamp: float,
+                                          site_id: str = "default") -> float:
+        """
+        Gaussian-plume variant of calculate_dispersion_factor, same scale
+        Uses wind direction and atmospheric stability instead of speed thresholds
+        """
+        from plume_dispersion import estimate_stability_class
+        
+        hour = time.localtime(timestamp).tm_hour
+        stability = estimate_stability_class(wind_speed, temperature, pressure, daytime=6 <= hour < 18)
+        plume_factor = self.plume_model.dispersion_factor(wind_speed, wind_direction, stability, site_id=site_id)
+        
+        humidity_factor = 1.0 - (humidity - 50) * 0.002 if humidity > 50 else 1.0
+        return plume_factor * humidity_factor
 
 class RiskAssessmentEngine:
     """Main risk assessment engine"""
     
-    def __init__(self, fuel_type: FuelType = FuelType.PETROL):
+    FAULT_CONFIDENCE_PENALTIES = {
+        SensorFault.STUCK: 0.5,
+        SensorFault.SPIKE: 0.8,
+        SensorFault.RATE_OF_CHANGE: 0.8,
+        SensorFault.GAP: 0.7,
+    }
+    
+    def __init__(self, fuel_type: FuelType = FuelType.PETROL, dispersion_mode: str = "threshold",
+                 plume_model=None, site_id: str = "default"):
         self.fuel_type = fuel_type
         self.fuel_props = FuelProperties.FUEL_DATA[fuel_type]
         self.trend_analyzer = TrendAnalyzer()
-        self.weather_calculator = WeatherImpactCalculator()
+        
+        # Dispersion model: "threshold" (wind speed steps) or "plume" (Gaussian plume grid)
+        # Devices at one site should share a plume_model so its per-site field cache is reused
+        if dispersion_mode == "plume":
+            if plume_model is None:
+                from plume_dispersion import GaussianPlumeModel
+                plume_model = GaussianPlumeModel(vapor_density=self.fuel_props["vapor_density"])
+            if site_id not in plume_model.sites:
+                raise ValueError(f"Unknown plume site: {site_id}")
+        elif dispersion_mode == "threshold":
+            if plume_model is not None:
+                raise ValueError("plume_model requires dispersion_mode='plume'")
+        else:
+            raise ValueError(f"Unknown dispersion mode: {dispersion_mode}")
+        self.dispersion_mode = dispersion_mode
+        self.site_id = site_id
+        self.weather_calculator = WeatherImpactCalculator(plume_model)
         
         # Configurable thresholds
         self.thresholds = {
@@ -173,11 +370,35 @@ class RiskAssessmentEngine:
             "temp_critical_c": self.fuel_props["autoignition_c"] * 0.7,
             "flame_ir_threshold": 512,  # ADC reading threshold
             "flame_uv_threshold": 256,
+            "forecast_horizon_s": 300,  # Pre-emptive alert horizon, 0 disables
+            "forecast_confirm_readings": 3,  # Consecutive readings that must forecast the breach
         }
+        self.forecaster = ThresholdForecaster()
+    
+    def export_state(self) -> Dict[str, object]:
+        """Per-device state (trend window, forecaster, thresholds) for handoff to another node"""
+        return {
+            "fuel_type": self.fuel_type,
+            "dispersion_mode": self.dispersion_mode,
+            "site_id": self.site_id,
+            "thresholds": dict(self.thresholds),
+            "history": list(self.trend_analyzer.history),
+            "forecaster": self.forecaster,
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, object], plume_model=None) -> "RiskAssessmentEngine":
+        """Rebuild an engine from export_state() output, optionally on the new node's shared plume model"""
+        engine = cls(state["fuel_type"], dispersion_mode=state["dispersion_mode"], plume_model=plume_model,
+                     site_id=state.get("site_id", "default"))
+        engine.thresholds.update(state["thresholds"])
+        engine.trend_analyzer.history.extend(state["history"])
+        engine.forecaster = state["forecaster"]
+        return engine
     
     def assess_risk(self, reading: SensorReading) -> RiskAssessment:
         """Main risk assessment function"""
-        self.trend_analyzer.add_reading(reading)
+        forecast = self._observe(reading)
         
         # Initialize risk calculation
         risk_score = 0.0
@@ -185,16 +406,8 @@ class RiskAssessmentEngine:
         recommended_actions = []
         
         # 1. Immediate flame detection (highest priority)
-        if reading.flame_detected or (reading.flame_ir_raw > self.thresholds["flame_ir_threshold"] 
-                                     and reading.flame_uv_raw > self.thresholds["flame_uv_threshold"]):
-            return RiskAssessment(
-                risk_level=RiskLevel.CRITICAL,
-                risk_score=1.0,
-                contributing_factors=["Direct flame detected"],
-                recommended_actions=["IMMEDIATE EVACUATION", "Activate fire suppression", "Emergency shutdown"],
-                confidence=0.95,
-                timestamp=reading.timestamp
-            )
+        if self._flame_present(reading):
+            return self._flame_assessment(reading, forecast)
         
         # 2. Gas concentration risk
         gas_risk = self._assess_gas_risk(reading, contributing_factors, recommended_actions)
@@ -208,6 +421,33 @@ class RiskAssessmentEngine:
         env_risk = self._assess_environmental_risk(reading, contributing_factors, recommended_actions)
         risk_score += env_risk * 0.2  # 20% weight
         
+        return self._complete_assessment(reading, forecast, risk_score, contributing_factors, recommended_actions)
+    
+    def _observe(self, reading: SensorReading) -> Optional[ThresholdForecast]:
+        """Update per-device state (trend window, forecaster) with a new reading"""
+        self.trend_analyzer.add_reading(reading)
+        self.forecaster.add_reading(reading)
+        return self.forecaster.forecast(self.thresholds)
+    
+    def _flame_present(self, reading: SensorReading) -> bool:
+        return reading.flame_detected or (reading.flame_ir_raw > self.thresholds["flame_ir_threshold"]
+                                          and reading.flame_uv_raw > self.thresholds["flame_uv_threshold"])
+    
+    def _flame_assessment(self, reading: SensorReading, forecast: Optional[ThresholdForecast]) -> RiskAssessment:
+        return RiskAssessment(
+            risk_level=RiskLevel.CRITICAL,
+            risk_score=1.0,
+            contributing_factors=["Direct flame detected"],
+            recommended_actions=["IMMEDIATE EVACUATION", "Activate fire suppression", "Emergency shutdown"],
+            confidence=0.95,
+            timestamp=reading.timestamp,
+            forecast=forecast
+        )
+    
+    def _complete_assessment(self, reading: SensorReading, forecast: Optional[ThresholdForecast],
+                             risk_score: float, contributing_factors: List[str], recommended_actions: List[str],
+                             dispersion_factor: Optional[float] = None) -> RiskAssessment:
+        """Trend, weather, fault and forecast stages on top of the gas/temperature/environment score"""
         # 5. Trend analysis
         trend_factor = self.trend_analyzer.calculate_trend_factor()
         trend_risk = (trend_factor - 1.0) * 0.5  # Convert to 0-1 scale
@@ -217,11 +457,18 @@ class RiskAssessmentEngine:
             contributing_factors.append(f"Increasing trend detected (factor: {trend_factor:.2f})")
             recommended_actions.append("Monitor closely - conditions deteriorating")
         
-        # Apply weather dispersion effects
-        dispersion_factor = self.weather_calculator.calculate_dispersion_factor(
-            reading.wind_speed_mps, reading.wind_direction_deg,
-            reading.temperature_c, reading.humidity_rh, reading.barometric_pressure_hpa
-        )
+        # Apply weather dispersion effects (batch scorers may pass it precomputed)
+        if dispersion_factor is None and self.weather_calculator.plume_model is not None:
+            dispersion_factor = self.weather_calculator.calculate_plume_dispersion_factor(
+                reading.wind_speed_mps, reading.wind_direction_deg,
+                reading.temperature_c, reading.humidity_rh, reading.barometric_pressure_hpa,
+                reading.timestamp, site_id=self.site_id
+            )
+        elif dispersion_factor is None:
+            dispersion_factor = self.weather_calculator.calculate_dispersion_factor(
+                reading.wind_speed_mps, reading.wind_direction_deg,
+                reading.temperature_c, reading.humidity_rh, reading.barometric_pressure_hpa
+            )
         risk_score *= dispersion_factor
         
         if dispersion_factor > 1.2:
@@ -229,19 +476,51 @@ class RiskAssessmentEngine:
         elif dispersion_factor < 0.8:
             contributing_factors.append("Good weather conditions aiding vapor dispersion")
         
+        if reading.fault_flags:
+            faults = [fault.name for fault in SensorFault if fault and reading.fault_flags & fault]
+            contributing_factors.append(f"Sensor data quality issues: {', '.join(faults)}")
+            if reading.fault_flags & SensorFault.STUCK:
+                recommended_actions.append("Inspect sensor - output appears stuck")
+        
         # Determine final risk level
         risk_level = self._score_to_level(risk_score)
         confidence = self._calculate_confidence(reading)
         
+        # Pre-emptive alert when a critical threshold is forecast within the horizon
+        if forecast and self._forecast_breach(forecast, contributing_factors, recommended_actions):
+            risk_level = max(risk_level, RiskLevel.MEDIUM, key=lambda level: level.value)
+        
         return RiskAssessment(
             risk_level=risk_level,
             risk_score=min(1.0, risk_score),
             contributing_factors=contributing_factors,
             recommended_actions=recommended_actions,
             confidence=confidence,
-            timestamp=reading.timestamp
+            timestamp=reading.timestamp,
+            forecast=forecast
         )
     
+    def _forecast_breach(self, forecast: ThresholdForecast, factors: List[str], actions: List[str]) -> bool:
+        """Report critical thresholds forecast to be reached within the horizon on enough consecutive readings"""
+        if not self.thresholds["forecast_horizon_s"]:
+            return False
+        confirm = self.thresholds["forecast_confirm_readings"]
+        
+        breach = False
+        if forecast.gas_breach_readings >= confirm:
+            gas_critical = self.thresholds["gas_critical_ppm"]
+            factors.append(f"Gas forecast to reach {gas_critical:.0f} ppm "
+                           f"({gas_critical / self.fuel_props['lel_ppm']:.0%} LEL) in {_format_eta(forecast.gas_eta_s)}")
+            breach = True
+        if forecast.temp_breach_readings >= confirm:
+            factors.append(f"Temperature forecast to reach {self.thresholds['temp_critical_c']:.0f}°C "
+                           f"in {_format_eta(forecast.temp_eta_s)}")
+            breach = True
+        
+        if breach:
+            actions.append("Pre-emptive response - prepare before threshold is reached")
+        return breach
+    
     def _assess_gas_risk(self, reading: SensorReading, factors: List[str], actions: List[str]) -> float:
         """Assess risk from gas concentrations"""
         gas_concentration = max(reading.gas_lpg_ppm, reading.gas_smoke_ppm)
@@ -324,7 +603,19 @@ class RiskAssessmentEngine:
         if reading.wind_speed_mps > 20 or reading.humidity_rh > 95:
             confidence *= 0.9
         
-        return max(0.5, confidence)
+        confidence = max(0.5, confidence)
+        
+        # Faults flagged by the data quality pipeline reduce confidence below the floor
+        for fault, penalty in self.FAULT_CONFIDENCE_PENALTIES.items():
+            if reading.fault_flags & fault:
+                confidence *= penalty
+        
+        return confidence
+
+def _format_eta(seconds: float) -> str:
+    if seconds < 60:
+        return f"~{seconds:.0f} s"
+    return f"~{seconds / 60:.0f} min"
 
 class SensorSimulator:
     """Simulates realistic sensor data for testing"""
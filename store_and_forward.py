@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Store-and-Forward Offline Buffer
+Disk-backed queue for messages that could not be sent while a channel was down.
+A fixed-size memory-mapped ring file bounds disk use; on reconnect messages drain in
+priority order and redundant SENSOR_DATA for the same device/channel/contact is compacted
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+from risk_assessment_engine import RiskAssessment, RiskLevel, SensorReading, ThresholdForecast
+
+# File header: magic, version, slot size, capacity
+HEADER = struct.Struct("<4sHII")
+HEADER_SIZE = 64
+MAGIC = b"FDSF"
+VERSION = 1
+
+# Slot header: state, priority, payload length, sequence number
+SLOT_HEADER = struct.Struct("<BBxxIQ")
+SLOT_EMPTY = 0
+SLOT_LIVE = 1
+
+@dataclass
+class BufferedRecord:
+    """A buffered (message, contact, channel) delivery"""
+    slot: int
+    seq: int
+    priority: int
+    message: "DeviceMessage"
+    contact: "AlertContact"
+    channel: "CommunicationChannel"
+
+def message_priority(message) -> int:
+    """Drain order: higher risk first, alerts before routine data at the same risk"""
+    from communication_system import MessageType
+
+    return message.risk_level.value * 2 + (1 if message.message_type == MessageType.ALERT else 0)
+
+def _encode(message, contact, channel) -> bytes:
+    message_dict = asdict(message)
+    message_dict["message_type"] = message.message_type.value
+    message_dict["risk_level"] = message.risk_level.value
+    if message.risk_assessment:
+        message_dict["risk_assessment"]["risk_level"] = message.risk_assessment.risk_level.value
+    contact_dict = asdict(contact)
+    contact_dict["channels"] = [c.value for c in contact.channels]
+    return json.dumps({"message": message_dict, "contact": contact_dict, "channel": channel.value},
+                      separators=(",", ":")).encode()
+
+def _decode(payload: bytes):
+    from communication_system import AlertContact, CommunicationChannel, DeviceMessage, MessageType
+
+    data = json.loads(payload)
+    message = data["message"]
+    message["message_type"] = MessageType(message["message_type"])
+    message["risk_level"] = RiskLevel(message["risk_level"])
+    if message["sensor_data"]:
+        message["sensor_data"] = SensorReading(**message["sensor_data"])
+    if message["risk_assessment"]:
+        assessment = message["risk_assessment"]
+        assessment["risk_level"] = RiskLevel(assessment["risk_level"])
+        if assessment.get("forecast"):
+            assessment["forecast"] = ThresholdForecast(**assessment["forecast"])
+        message["risk_assessment"] = RiskAssessment(**assessment)
+    contact = data["contact"]
+    contact["channels"] = [CommunicationChannel(c) for c in contact["channels"]]
+    return DeviceMessage(**message), AlertContact(**contact), CommunicationChannel(data["channel"])
+
+class OfflineBuffer:
+    """Fixed-size memory-mapped ring of message slots; file size never changes after creation"""
+
+    def __init__(self, path: str, capacity: int = 1024, slot_size: int = 4096):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "r+b" if exists else "w+b")
+
+        if exists:
+            magic, version, slot_size, capacity = HEADER.unpack_from(self._file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not an offline buffer file")
+        else:
+            self._file.truncate(HEADER_SIZE + capacity * slot_size)
+            self._file.seek(0)
+            self._file.write(HEADER.pack(MAGIC, VERSION, slot_size, capacity))
+            self._file.flush()
+
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self.max_payload = slot_size - SLOT_HEADER.size
+        self._mm = mmap.mmap(self._file.fileno(), HEADER_SIZE + capacity * slot_size)
+
+        # In-memory index, rebuilt from the file on open
+        self._live: Dict[int, Tuple[int, int]] = {}             # slot -> (priority, seq)
+        self._compaction_keys: Dict[Tuple[str, str, str], int] = {}  # (device, channel, contact) -> slot
+        self._slot_keys: Dict[int, Tuple[str, str, str]] = {}
+        self._free: List[int] = []
+        self._next_seq = 1
+        self.dropped = 0
+        self.compacted = 0
+        self.corrupt = 0  # Slots found unreadable on open (torn write) and freed
+        self._load()
+
+    def _offset(self, slot: int) -> int:
+        return HEADER_SIZE + slot * self.slot_size
+
+    def _load(self):
+        for slot in range(self.capacity):
+            state, priority, length, seq = SLOT_HEADER.unpack_from(self._mm, self._offset(slot))
+            if state != SLOT_LIVE:
+                self._free.append(slot)
+                continue
+            try:
+                if length > self.max_payload:
+                    raise ValueError(f"payload length {length}")
+                key = self._compaction_key(*_decode(self._read_payload(slot, length)))
+            except (ValueError, KeyError, TypeError) as e:
+                # One unreadable slot must not take the rest of the buffer down with it
+                logging.getLogger(__name__).warning(f"Offline buffer slot {slot} is corrupt, freeing it: {e}")
+                SLOT_HEADER.pack_into(self._mm, self._offset(slot), SLOT_EMPTY, 0, 0, 0)
+                self._free.append(slot)
+                self.corrupt += 1
+                continue
+            self._next_seq = max(self._next_seq, seq + 1)
+            if key and key in self._compaction_keys:
+                # A crash between writing a compacted copy and retiring the old one leaves both; keep the newer
+                previous = self._compaction_keys[key]
+                if self._live[previous][1] > seq:
+                    SLOT_HEADER.pack_into(self._mm, self._offset(slot), SLOT_EMPTY, 0, 0, 0)
+                    self._free.append(slot)
+                    continue
+                self.remove(previous)
+            self._live[slot] = (priority, seq)
+            if key:
+                self._compaction_keys[key] = slot
+                self._slot_keys[slot] = key
+        # Hand out low slots first so a mostly idle buffer touches few pages
+        self._free.sort(reverse=True)
+
+    @staticmethod
+    def _compaction_key(message, contact, channel) -> Optional[Tuple[str, str, str]]:
+        from communication_system import MessageType
+
+        if message.message_type != MessageType.SENSOR_DATA:
+            return None
+        return (message.device_id, channel.value, contact.name)
+
+    def _read_payload(self, slot: int, length: int) -> bytes:
+        start = self._offset(slot) + SLOT_HEADER.size
+        return self._mm[start:start + length]
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    @property
+    def disk_bytes(self) -> int:
+        return HEADER_SIZE + self.capacity * self.slot_size
+
+    def put(self, message, contact, channel) -> bool:
+        """Buffer a delivery; returns False if it was rejected because the buffer is full of higher priority"""
+        payload = _encode(message, contact, channel)
+        if len(payload) > self.max_payload:
+            raise ValueError(f"Message {message.message_id} is {len(payload)} bytes, slot holds {self.max_payload}")
+        priority = message_priority(message)
+
+        # Newer sensor data for the same destination supersedes the buffered copy. It goes to a
+        # free slot and the old one is retired afterwards, so a torn write never corrupts a live record
+        key = self._compaction_key(message, contact, channel)
+        superseded = self._compaction_keys.get(key) if key else None
+        if superseded is not None:
+            self.compacted += 1
+        if self._free:
+            slot = self._free.pop()
+        elif superseded is not None:
+            # Full: retire the superseded copy first; a torn write can then only lose that sensor data
+            self.remove(superseded)
+            slot = self._free.pop()
+            superseded = None
+        else:
+            slot = self._evict_for(priority)
+            if slot is None:
+                self.dropped += 1
+                return False
+
+        seq = self._next_seq
+        self._next_seq += 1
+        offset = self._offset(slot)
+        self._mm[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + len(payload)] = payload
+        # Header last, so a crash mid-write never exposes a half-written payload as live
+        SLOT_HEADER.pack_into(self._mm, offset, SLOT_LIVE, priority, len(payload), seq)
+        self._mm.flush(offset - offset % mmap.ALLOCATIONGRANULARITY,
+                       offset % mmap.ALLOCATIONGRANULARITY + self.slot_size)
+
+        if superseded is not None:
+            self.remove(superseded)
+        self._live[slot] = (priority, seq)
+        if key:
+            self._compaction_keys[key] = slot
+            self._slot_keys[slot] = key
+        return True
+
+    def _evict_for(self, priority: int) -> Optional[int]:
+        """Free the lowest-priority, oldest slot if it is not more important than the new message"""
+        slot, (victim_priority, _) = min(self._live.items(), key=lambda item: item[1])
+        if victim_priority > priority:
+            return None
+        self.remove(slot)
+        self.dropped += 1
+        return self._free.pop()
+
+    def pending(self, channel=None) -> List[BufferedRecord]:
+        """Buffered deliveries in drain order (priority, then age), optionally for one channel"""
+        records = []
+        for slot, (priority, seq) in sorted(self._live.items(), key=lambda item: (-item[1][0], item[1][1])):
+            length = SLOT_HEADER.unpack_from(self._mm, self._offset(slot))[2]
+            message, contact, record_channel = _decode(self._read_payload(slot, length))
+            if channel is None or record_channel == channel:
+                records.append(BufferedRecord(slot, seq, priority, message, contact, record_channel))
+        return records
+
+    def remove(self, slot: int, seq: Optional[int] = None):
+        """Release a slot after successful delivery; with seq, only if it still holds that record"""
+        if slot not in self._live or (seq is not None and self._live[slot][1] != seq):
+            return
+        SLOT_HEADER.pack_into(self._mm, self._offset(slot), SLOT_EMPTY, 0, 0, 0)
+        del self._live[slot]
+        key = self._slot_keys.pop(slot, None)
+        if key:
+            del self._compaction_keys[key]
+        self._free.append(slot)
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
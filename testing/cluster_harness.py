@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Local multi-process cluster harness
+Runs N assessment nodes as separate processes, routes devices with the consistent-hash
+ring, measures aggregate throughput, then joins one more node and checks that device
+state is handed over intact.
+
+    python testing/cluster_harness.py --nodes 1 2 4 --devices 500 --duration 5
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from partitioning import AssessmentNode, ConsistentHashRing
+from risk_assessment_engine import SensorSimulator, FuelType
+
+def node_worker(node_id: str, commands: mp.Queue, results: mp.Queue):
+    """Node process: simulates ingest for the devices it owns and serves handoff requests"""
+    node = AssessmentNode(node_id, FuelType.PETROL)
+    simulator = SensorSimulator(FuelType.PETROL)
+
+    while True:
+        command, payload = commands.get()
+        if command == "run":
+            device_ids, duration = payload
+            processed = 0
+            start = time.perf_counter()
+            deadline = start + duration
+            while device_ids and time.perf_counter() < deadline:
+                for device_id in device_ids:
+                    node.assess(device_id, simulator.generate_reading("gas_leak"))
+                processed += len(device_ids)
+            results.put((node_id, processed, time.perf_counter() - start))
+        elif command == "export":
+            results.put((node_id, node.export_devices(payload)))
+        elif command == "import":
+            node.import_devices(payload)
+            results.put((node_id, "imported"))
+        elif command == "history":
+            results.put((node_id, {d: len(e.trend_analyzer.history) for d, e in node.engines.items()}))
+        elif command == "stop":
+            return
+
+class LocalCluster:
+    """Parent-side controller for the node processes"""
+
+    def __init__(self, node_count: int):
+        self.ring = ConsistentHashRing()
+        self.results = mp.Queue()
+        self.commands: Dict[str, mp.Queue] = {}
+        self.processes: Dict[str, mp.Process] = {}
+        for i in range(node_count):
+            self._start_node(f"node-{i}")
+
+    def _start_node(self, node_id: str):
+        self.commands[node_id] = mp.Queue()
+        process = mp.Process(target=node_worker, args=(node_id, self.commands[node_id], self.results), daemon=True)
+        process.start()
+        self.processes[node_id] = process
+        self.ring.add_node(node_id)
+
+    def assignment(self, device_ids: List[str]) -> Dict[str, List[str]]:
+        owned = {node_id: [] for node_id in self.commands}
+        for device_id in device_ids:
+            owned[self.ring.node_for(device_id)].append(device_id)
+        return owned
+
+    def run(self, device_ids: List[str], duration: float) -> Dict[str, float]:
+        """All nodes ingest their devices concurrently; returns aggregate readings/s"""
+        owned = self.assignment(device_ids)
+        for node_id, devices in owned.items():
+            self.commands[node_id].put(("run", (devices, duration)))
+        reports = [self.results.get() for _ in owned]
+        total = sum(processed for _, processed, _ in reports)
+        wall = max(elapsed for _, _, elapsed in reports)
+        return {"readings": total, "throughput": total / wall if wall else 0.0}
+
+    def histories(self) -> Dict[str, int]:
+        for queue in self.commands.values():
+            queue.put(("history", None))
+        merged = {}
+        for _ in self.commands:
+            merged.update(self.results.get()[1])
+        return merged
+
+    def join(self, node_id: str, device_ids: List[str]) -> int:
+        """Start a node and move the devices that now hash to it; returns devices moved"""
+        before = self.assignment(device_ids)
+        self._start_node(node_id)
+
+        moved = 0
+        for old_owner, devices in before.items():
+            leaving = [d for d in devices if self.ring.node_for(d) == node_id]
+            if not leaving:
+                continue
+            self.commands[old_owner].put(("export", leaving))
+            _, handoff = self.results.get()
+            self.commands[node_id].put(("import", handoff))
+            self.results.get()
+            moved += len(leaving)
+        return moved
+
+    def stop(self):
+        for queue in self.commands.values():
+            queue.put(("stop", None))
+        for process in self.processes.values():
+            process.join(timeout=5)
+
+def run_harness(node_counts: List[int], devices: int, duration: float):
+    device_ids = [f"TANK_{i:05d}" for i in range(devices)]
+    baseline = None
+
+    print(f"CPU cores available: {os.cpu_count()}")
+    for count in node_counts:
+        cluster = LocalCluster(count)
+        try:
+            result = cluster.run(device_ids, duration)
+            baseline = baseline or result["throughput"]
+            print(f"{count} node(s): {result['throughput']:>10,.0f} readings/s "
+                  f"(x{result['throughput'] / baseline:.2f} vs 1 node)")
+
+            # Join one more node and verify trend windows survived the handoff
+            before = cluster.histories()
+            moved = cluster.join(f"node-{count}", device_ids)
+            after = cluster.histories()
+            intact = before == after
+            print(f"  join node-{count}: {moved} devices moved ({moved / devices:.1%}), "
+                  f"state intact: {intact}")
+        finally:
+            cluster.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local multi-process cluster harness")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+    run_harness(args.nodes, args.devices, args.duration)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Parity harness: fixed-point scoring core vs RiskAssessmentEngine.assess_risk
+Streams simulated readings per device through both and reports divergence.
+
+    python testing/fixed_point_parity.py --readings 1000000 --devices 50
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fixed_point_scoring import FixedPointScoringCore, dequantize_reading, q_to_float
+from risk_assessment_engine import RiskAssessmentEngine, SensorReading, FuelType
+
+# Scenario -> (gas ppm range, temperature range); weather is drawn over the full sensor range
+SCENARIOS = {
+    "normal": ((10, 100), (20, 35)),
+    "gas_leak": ((500, 4000), (20, 40)),
+    "temperature_rise": ((200, 800), (40, 220)),
+    "cold_calm": ((10, 2000), (-10, 12)),
+}
+
+@dataclass
+class ParityReport:
+    readings: int = 0
+    level_mismatches: int = 0
+    edge_lower: int = 0           # Fixed-point core called a lower level than the engine
+    max_score_diff: float = 0.0
+    total_score_diff: float = 0.0
+    mismatch_pairs: Counter = field(default_factory=Counter)
+    elapsed_s: float = 0.0
+
+    @property
+    def mismatch_rate(self) -> float:
+        return self.level_mismatches / self.readings if self.readings else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"Readings: {self.readings:,} in {self.elapsed_s:.1f} s",
+            f"Level mismatches: {self.level_mismatches:,} ({self.mismatch_rate:.5%})",
+            f"  edge lower than cloud: {self.edge_lower:,}",
+            f"Score difference: max {self.max_score_diff:.6f}, "
+            f"mean {self.total_score_diff / max(1, self.readings):.8f}",
+        ]
+        for (cloud, edge), count in self.mismatch_pairs.most_common(5):
+            lines.append(f"  cloud {cloud} -> edge {edge}: {count:,}")
+        return "\n".join(lines)
+
+def random_reading(rng: random.Random, timestamp: float, scenario: str) -> SensorReading:
+    (gas_lo, gas_hi), (temp_lo, temp_hi) = SCENARIOS[scenario]
+    flame = rng.random() < 0.002
+    return SensorReading(
+        timestamp=timestamp,
+        gas_lpg_ppm=rng.uniform(gas_lo, gas_hi),
+        gas_smoke_ppm=rng.uniform(gas_lo, gas_hi) * 0.3,
+        temperature_c=rng.uniform(temp_lo, temp_hi),
+        humidity_rh=rng.uniform(10, 100),
+        flame_ir_raw=rng.randint(800, 1023) if flame else rng.randint(100, 600),
+        flame_uv_raw=rng.randint(600, 1023) if flame else rng.randint(50, 300),
+        flame_detected=flame,
+        wind_speed_mps=rng.uniform(0, 1.5) if scenario == "cold_calm" else rng.uniform(0, 12),
+        wind_direction_deg=rng.randint(0, 359),
+        barometric_pressure_hpa=rng.uniform(1015, 1035) if scenario == "cold_calm" else rng.uniform(990, 1035),
+        data_quality=rng.randint(80, 100)
+    )
+
+def run_parity(readings: int = 1_000_000, devices: int = 50, fuel_type: FuelType = FuelType.PETROL,
+               quantize_inputs: bool = True, seed: int = 0) -> ParityReport:
+    """
+    With quantize_inputs the engine sees the same integer-resolution values as the core,
+    so the report isolates arithmetic divergence from sensor resolution
+    """
+    rng = random.Random(seed)
+    report = ParityReport()
+    pairs: Dict[int, Tuple[RiskAssessmentEngine, FixedPointScoringCore]] = {}
+    scenario_names = list(SCENARIOS)
+    scenarios = [rng.choice(scenario_names) for _ in range(devices)]
+
+    start = time.perf_counter()
+    for i in range(readings):
+        device = i % devices
+        if device not in pairs:
+            engine = RiskAssessmentEngine(fuel_type)
+            engine.thresholds["forecast_horizon_s"] = 0  # Forecasting is cloud-only
+            pairs[device] = (engine, FixedPointScoringCore(fuel_type))
+        engine, core = pairs[device]
+
+        # Devices drift between scenarios so trend windows see transitions
+        if rng.random() < 0.01:
+            scenarios[device] = rng.choice(scenario_names)
+
+        reading = random_reading(rng, 1_700_000_000.0 + i, scenarios[device])
+        if quantize_inputs:
+            reading = dequantize_reading(reading)
+
+        assessment = engine.assess_risk(reading)
+        edge_level, edge_score_q = core.score_reading(reading)
+
+        report.readings += 1
+        diff = abs(assessment.risk_score - q_to_float(edge_score_q))
+        report.total_score_diff += diff
+        report.max_score_diff = max(report.max_score_diff, diff)
+        if edge_level != assessment.risk_level.value:
+            report.level_mismatches += 1
+            report.mismatch_pairs[(assessment.risk_level.value, edge_level)] += 1
+            if edge_level < assessment.risk_level.value:
+                report.edge_lower += 1
+
+    report.elapsed_s = time.perf_counter() - start
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readings", type=int, default=1_000_000)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--fuel", choices=[f.value for f in FuelType], default=FuelType.PETROL.value)
+    parser.add_argument("--raw-inputs", action="store_true",
+                        help="Feed the engine unquantized readings (includes sensor resolution effects)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = run_parity(args.readings, args.devices, FuelType(args.fuel),
+                        quantize_inputs=not args.raw_inputs, seed=args.seed)
+    print(report.summary())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark
+Imports each module in fresh interpreters with -X importtime and checks the median
+cumulative import time against the cold-start budget.
+
+    python testing/import_benchmark.py --runs 7
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Cold-start budget per module (ms of cumulative import time, excluding interpreter startup)
+COLD_START_BUDGET_MS = {
+    "risk_assessment_engine": 75,
+    "communication_system": 120,
+}
+
+# Optional backends that must not be pulled in by a plain import
+HEAVY_MODULES = ["numpy", "aiohttp", "asyncio"]
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of one module in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+def loaded_heavy_modules(module: str) -> List[str]:
+    """Heavy modules present in sys.modules after importing `module`"""
+    check = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", check], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+def run_benchmark(runs: int = 5) -> Dict[str, Dict[str, object]]:
+    results = {}
+    for module, budget in COLD_START_BUDGET_MS.items():
+        samples = [import_time_ms(module) for _ in range(runs)]
+        median = statistics.median(samples)
+        heavy = loaded_heavy_modules(module)
+        results[module] = {
+            "median_ms": median,
+            "min_ms": min(samples),
+            "budget_ms": budget,
+            "heavy_modules": heavy,
+            "ok": median <= budget and not heavy,
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.runs)
+    for module, result in results.items():
+        status = "OK" if result["ok"] else "OVER BUDGET"
+        heavy = ", ".join(result["heavy_modules"]) or "none"
+        print(f"{module:<26} median {result['median_ms']:6.1f} ms (min {result['min_ms']:.1f}) "
+              f"budget {result['budget_ms']} ms, heavy imports: {heavy} [{status}]")
+
+    sys.exit(0 if all(result["ok"] for result in results.values()) else 1)
+
+if __name__ == "__main__":
+    main()
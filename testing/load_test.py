@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Load and soak test harness for alert storms
+Drives RiskAssessmentEngine and CommunicationManager with the simulator at a fixed ingest
+rate against local stand-in HTTP/webhook/SMS sinks with injected latency and errors.
+Periodic storms switch every tank to a fire event at once. Reports alert latency,
+memory growth, asyncio task counts and event-loop lag per interval. --tracemalloc
+attributes growth to allocation sites but slows the run several times over.
+--offload scores readings with AsyncRiskEngine instead of on the event loop.
+
+    python testing/load_test.py --tanks 500 --duration 60
+    python testing/load_test.py --tanks 500 --duration 7200 --report-every 300   # soak
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from communication_system import (AlertConfig, AlertContact, CommunicationChannel, CommunicationManager,
+                                  DeviceMessage, MessageType)
+from risk_assessment_engine import (RiskAssessment, RiskAssessmentEngine, RiskLevel, SensorReading,
+                                    SensorSimulator, FuelType)
+
+def rss_bytes() -> int:
+    """Resident set size; falls back to peak RSS where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+class LatencyReservoir:
+    """Uniform random sample of a run's latencies (Algorithm R); memory stays fixed however long a soak runs"""
+
+    def __init__(self, size: int = 10_000, seed: int = 0):
+        self.size = size
+        self.rng = random.Random(seed)
+        self.samples: List[float] = []
+        self.count = 0
+        self.max = 0.0
+
+    def extend(self, values: Sequence[float]):
+        for value in values:
+            self.count += 1
+            self.max = max(self.max, value)
+            if len(self.samples) < self.size:
+                self.samples.append(value)
+            else:
+                slot = self.rng.randrange(self.count)
+                if slot < self.size:
+                    self.samples[slot] = value
+
+    def percentile(self, q: float) -> float:
+        return percentile(self.samples, q)
+
+class EventLoopLagMonitor:
+    """Measures how late a periodic wake-up fires; the lateness is time the loop spent blocked"""
+
+    def __init__(self, interval_s: float = 0.02):
+        self.interval_s = interval_s
+        self.samples: List[float] = []
+        self.max_lag_s = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval_s)
+            lag = max(0.0, time.perf_counter() - start - self.interval_s)
+            self.samples.append(lag)
+            self.max_lag_s = max(self.max_lag_s, lag)
+
+    def take(self) -> List[float]:
+        """Samples since the last call; keeps long soak runs bounded"""
+        samples, self.samples = self.samples, []
+        return samples
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+class StandInSinks:
+    """Local stand-ins for the alert API, webhook and SMS gateway, served from their own thread"""
+
+    ROUTES = {"http": "/fire-alerts", "webhook": "/webhook", "sms": "/sms"}
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 50.0, error_rate: float = 0.01, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.received = Counter()
+        self.errors = Counter()
+        self.base_url = ""
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self) -> str:
+        self._thread.start()
+        self._ready.wait()
+        return self.base_url
+
+    def _serve(self):
+        from aiohttp import web
+
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        for name, route in self.ROUTES.items():
+            app.router.add_post(route, self._handler(name))
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+        self._ready.set()
+        self._loop.run_forever()
+
+    def _handler(self, name: str):
+        from aiohttp import web
+
+        async def handle(request):
+            await request.read()
+            await asyncio.sleep((self.latency_ms + self.rng.uniform(0, self.jitter_ms)) / 1000)
+            if self.rng.random() < self.error_rate:
+                self.errors[name] += 1
+                return web.Response(status=503)
+            self.received[name] += 1
+            return web.Response(status=200)
+        return handle
+
+    def url(self, name: str) -> str:
+        return self.base_url + self.ROUTES[name]
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+
+@dataclass
+class IntervalSample:
+    elapsed_s: float
+    alerts: int
+    latency_p50_ms: float
+    latency_p99_ms: float
+    memory_bytes: int
+    tasks: int
+    lag_p99_ms: float
+    lag_max_ms: float
+
+    def line(self) -> str:
+        return (f"[{self.elapsed_s:7.0f} s] alerts {self.alerts:6d}  latency p50 {self.latency_p50_ms:7.1f} ms "
+                f"p99 {self.latency_p99_ms:7.1f} ms  memory {self.memory_bytes / 1e6:7.2f} MB  "
+                f"tasks {self.tasks:5d}  loop lag p99 {self.lag_p99_ms:6.1f} ms max {self.lag_max_ms:6.1f} ms")
+
+@dataclass
+class LoadReport:
+    readings: int = 0
+    alerts: int = 0
+    latency_p50_ms: float = 0.0
+    latency_p99_ms: float = 0.0
+    latency_max_ms: float = 0.0
+    memory_start_bytes: int = 0
+    memory_end_bytes: int = 0
+    top_growth: List[str] = field(default_factory=list)
+    max_tasks: int = 0
+    lag_p99_ms: float = 0.0
+    lag_max_ms: float = 0.0
+    received: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    samples: List[IntervalSample] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = [
+            f"Readings: {self.readings:,}, alerts sent: {self.alerts:,}",
+            f"Alert latency: p50 {self.latency_p50_ms:.1f} ms, p99 {self.latency_p99_ms:.1f} ms, "
+            f"max {self.latency_max_ms:.1f} ms",
+            f"Memory: {self.memory_start_bytes / 1e6:.2f} MB -> {self.memory_end_bytes / 1e6:.2f} MB "
+            f"({(self.memory_end_bytes - self.memory_start_bytes) / 1e6:+.2f} MB)",
+            f"Max asyncio tasks: {self.max_tasks}",
+            f"Event-loop lag: p99 {self.lag_p99_ms:.1f} ms, max {self.lag_max_ms:.1f} ms",
+            "Sinks: " + ", ".join(f"{name} {self.received[name]:,} ok / {self.errors[name]:,} errors"
+                                  for name in StandInSinks.ROUTES),
+        ]
+        lines += [f"  growth: {entry}" for entry in self.top_growth]
+        return "\n".join(lines)
+
+def _traced_memory(exclude: Sequence[str]) -> tracemalloc.Snapshot:
+    """Snapshot without the harness's own bookkeeping"""
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)] + [tracemalloc.Filter(False, path) for path in exclude])
+
+async def run_load_test(tanks: int = 500, rate_hz: float = 1.0, duration_s: float = 60.0,
+                        storm_every_s: float = 30.0, storm_length_s: float = 10.0,
+                        latency_ms: float = 50.0, jitter_ms: float = 50.0, error_rate: float = 0.01,
+                        ack_rate: float = 0.9, escalation_minutes: int = 1, report_every_s: float = 10.0,
+                        trace_allocations: bool = False, offload: bool = False, seed: int = 0,
+                        verbose: bool = True) -> LoadReport:
+    rng = random.Random(seed)
+    report = LoadReport()
+    sinks = StandInSinks(latency_ms, jitter_ms, error_rate, seed)
+    sinks.start()
+
+    config = AlertConfig(escalation_delay_minutes=escalation_minutes, http_endpoint=sinks.url("http"),
+                         webhook_url=sinks.url("webhook"), sms_gateway_url=sinks.url("sms"))
+    manager = CommunicationManager(config)
+    for contact in [
+        AlertContact("Control Room", "+1000000001", "ops@site.example", "Operations", 1,
+                     [CommunicationChannel.HTTP_POST, CommunicationChannel.SMS]),
+        AlertContact("Safety Manager", "+1000000002", "safety@site.example", "Safety", 1,
+                     [CommunicationChannel.WEBHOOK]),
+        AlertContact("Maintenance", "+1000000003", "maint@site.example", "Maintenance", 2,
+                     [CommunicationChannel.SMS]),
+    ]:
+        manager.add_contact(contact)
+
+    simulator = SensorSimulator(FuelType.PETROL)
+    if offload:
+        from async_engine import AsyncRiskEngine
+        async_engine = AsyncRiskEngine(FuelType.PETROL)
+    else:
+        engines = [RiskAssessmentEngine(FuelType.PETROL) for _ in range(tanks)]
+    in_flight = set()
+    window_latencies: List[float] = []
+    all_latencies = LatencyReservoir(seed=seed)
+    window_alerts = 0
+
+    async def timed_send(message: DeviceMessage, arrived: float):
+        nonlocal window_alerts
+        await manager.send_message(message)
+        window_latencies.append((time.perf_counter() - arrived) * 1000)
+        window_alerts += 1
+        if rng.random() < ack_rate:
+            manager.acknowledge_message(message.message_id, "load-test operator")
+
+    def dispatch(device: int, reading: SensorReading, assessment: RiskAssessment, arrived: float):
+        if assessment.risk_level.value < RiskLevel.MEDIUM.value:
+            return
+        message = DeviceMessage(f"TANK_{device:04d}", reading.timestamp, MessageType.ALERT,
+                                assessment.risk_level, reading, assessment, 80, 70, -17.8216, 31.0492, "")
+        task = asyncio.create_task(timed_send(message, arrived))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    exclude = [__file__]
+    if trace_allocations:
+        tracemalloc.start()
+        baseline = _traced_memory(exclude)
+    monitor = EventLoopLagMonitor()
+    monitor.start()
+    report.memory_start_bytes = rss_bytes()
+
+    start = time.perf_counter()
+    next_tick = start
+    next_report = start + report_every_s
+    while True:
+        now = time.perf_counter()
+        elapsed = now - start
+        if elapsed >= duration_s:
+            break
+
+        in_storm = elapsed >= storm_every_s and elapsed % storm_every_s < storm_length_s
+        for device in range(tanks):
+            arrived = time.perf_counter()
+            reading = simulator.generate_reading("fire_event" if in_storm else "normal")
+            report.readings += 1
+            if offload:
+                future = async_engine.submit(f"TANK_{device:04d}", reading)
+                future.add_done_callback(
+                    lambda done, d=device, r=reading, a=arrived: dispatch(d, r, done.result(), a))
+            else:
+                dispatch(device, reading, engines[device].assess_risk(reading), arrived)
+
+        if now >= next_report:
+            lags = monitor.take()
+            sample = IntervalSample(elapsed, window_alerts, percentile(window_latencies, 50),
+                                    percentile(window_latencies, 99), rss_bytes(),
+                                    len(asyncio.all_tasks()), percentile(lags, 99) * 1000,
+                                    max(lags, default=0.0) * 1000)
+            report.samples.append(sample)
+            report.lag_p99_ms = max(report.lag_p99_ms, sample.lag_p99_ms)
+            all_latencies.extend(window_latencies)
+            window_latencies.clear()
+            window_alerts = 0
+            if verbose:
+                print(sample.line(), flush=True)
+            next_report += report_every_s
+
+        report.max_tasks = max(report.max_tasks, len(asyncio.all_tasks()))
+        next_tick += 1 / rate_hz
+        await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    if offload:
+        await async_engine.close()
+    if in_flight:
+        await asyncio.gather(*in_flight, return_exceptions=True)
+    all_latencies.extend(window_latencies)
+    report.lag_p99_ms = max(report.lag_p99_ms, percentile(monitor.take(), 99) * 1000)
+    report.lag_max_ms = monitor.max_lag_s * 1000
+    await monitor.stop()
+
+    report.memory_end_bytes = rss_bytes()
+    if trace_allocations:
+        growth = _traced_memory(exclude).compare_to(baseline, "lineno")
+        report.top_growth = [str(stat) for stat in growth[:5] if stat.size_diff > 0]
+        tracemalloc.stop()
+
+    report.alerts = all_latencies.count
+    report.latency_p50_ms = all_latencies.percentile(50)
+    report.latency_p99_ms = all_latencies.percentile(99)
+    report.latency_max_ms = all_latencies.max
+
+    for task in list(manager._escalation_tasks.values()):
+        task.cancel()
+    await manager.close()
+    sinks.stop()
+    report.received, report.errors = sinks.received, sinks.errors
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and soak test harness for alert storms")
+    parser.add_argument("--tanks", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=1.0, help="Readings per second per tank")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds; use hours for a soak run")
+    parser.add_argument("--storm-every", type=float, default=30.0)
+    parser.add_argument("--storm-length", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Injected sink latency")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Fraction of sink requests answered 503")
+    parser.add_argument("--ack-rate", type=float, default=0.9, help="Fraction of alerts operators acknowledge")
+    parser.add_argument("--escalation-minutes", type=int, default=1)
+    parser.add_argument("--report-every", type=float, default=10.0)
+    parser.add_argument("--offload", action="store_true", help="Score readings with AsyncRiskEngine")
+    parser.add_argument("--tracemalloc", action="store_true", help="Attribute memory growth to allocation sites")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    report = asyncio.run(run_load_test(args.tanks, args.rate, args.duration, args.storm_every, args.storm_length,
+                                       args.latency_ms, args.jitter_ms, args.error_rate, args.ack_rate,
+                                       args.escalation_minutes, args.report_every, args.tracemalloc, args.offload,
+                                       args.seed))
+    print(report.summary())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+LoRa codec benchmark: bytes and airtime per reading
+Streams telemetry from many devices through the codec and the simulated radio on a virtual
+clock, and compares delta frames with keyframe-only frames and the JSON payload.
+
+    python testing/lora_benchmark.py --devices 50 --readings 500 --uplink-loss 0.1 --downlink-loss 0.3
+"""
+
+import argparse
+import random
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from communication_system import DeviceMessage, MessageFormatter, MessageType
+from lora_codec import (DutyCycleExceeded, LoRaFrameDecoder, LoRaFrameEncoder, LoRaLink, SENSOR_FIELDS,
+                        SimulatedLoRaRadio)
+from risk_assessment_engine import RiskLevel, SensorReading, SensorSimulator, FuelType
+
+def random_walk(rng: random.Random, previous: SensorReading, interval_s: float) -> SensorReading:
+    """Slowly drifting telemetry, closer to real sensors than the simulator's white noise"""
+    return SensorReading(
+        timestamp=previous.timestamp + interval_s + rng.uniform(-0.5, 0.5),
+        gas_lpg_ppm=max(0.0, previous.gas_lpg_ppm + rng.gauss(0, 3)),
+        gas_smoke_ppm=max(0.0, previous.gas_smoke_ppm + rng.gauss(0, 1)),
+        temperature_c=previous.temperature_c + rng.gauss(0, 0.15),
+        humidity_rh=min(100.0, max(0.0, previous.humidity_rh + rng.gauss(0, 0.5))),
+        flame_ir_raw=min(1023, max(0, previous.flame_ir_raw + rng.randint(-3, 3))),
+        flame_uv_raw=min(1023, max(0, previous.flame_uv_raw + rng.randint(-2, 2))),
+        flame_detected=False,
+        wind_speed_mps=max(0.0, previous.wind_speed_mps + rng.gauss(0, 0.3)),
+        wind_direction_deg=(previous.wind_direction_deg + rng.randint(-10, 10)) % 360,
+        barometric_pressure_hpa=previous.barometric_pressure_hpa + rng.gauss(0, 0.05),
+        data_quality=previous.data_quality,
+    )
+
+@dataclass
+class CodecResult:
+    name: str
+    readings: int = 0
+    delivered: int = 0
+    deferred: int = 0
+    payload_bytes: int = 0
+    max_frame: int = 0
+    keyframes: int = 0
+    deltas: int = 0
+    airtime_s: float = 0.0
+    max_error: Dict[str, float] = field(default_factory=dict)
+
+    def line(self) -> str:
+        sent = self.keyframes + self.deltas
+        return (f"{self.name:<15} {self.payload_bytes / max(1, sent):6.1f} B/reading  max frame {self.max_frame:2d} B  "
+                f"airtime {self.airtime_s / max(1, sent) * 1000:5.0f} ms  keyframes {self.keyframes:,} / "
+                f"deltas {self.deltas:,}  delivered {self.delivered:,}/{self.readings:,} "
+                f"(deferred by duty cycle: {self.deferred:,})")
+
+def run_codec(name: str, streams: Dict[str, List[SensorReading]], interval_s: float, keyframe_every: int,
+              spreading_factor: int, uplink_loss: float, downlink_loss: float, seed: int) -> CodecResult:
+    result = CodecResult(name, max_error={field_name: 0.0 for field_name, _, _, _ in SENSOR_FIELDS})
+    originals = {}
+    received = []
+    decoder = LoRaFrameDecoder(on_message=received.append)
+    clock = [0.0]
+    frame_sizes = []
+
+    def gateway(device_id: str, frame: bytes):
+        frame_sizes.append(len(frame))
+        return decoder.receive(device_id, frame)
+
+    radio = SimulatedLoRaRadio(gateway, spreading_factor=spreading_factor, uplink_loss=uplink_loss,
+                               downlink_loss=downlink_loss, clock=lambda: clock[0], seed=seed)
+    link = LoRaLink(radio, LoRaFrameEncoder(keyframe_every=keyframe_every))
+
+    steps = len(next(iter(streams.values())))
+    for step in range(steps):
+        clock[0] = step * interval_s
+        for device_id, readings in streams.items():
+            reading = readings[step]
+            message = DeviceMessage(device_id, reading.timestamp, MessageType.SENSOR_DATA, RiskLevel.SAFE,
+                                    reading, None, 90, 70, -17.8216, 31.0492, "")
+            originals[(device_id, round(reading.timestamp * 1000))] = reading
+            result.readings += 1
+            try:
+                link.send(message)
+            except DutyCycleExceeded:
+                result.deferred += 1
+
+    for message in received:
+        original = originals[(message.device_id, round(message.timestamp * 1000))]
+        for field_name in result.max_error:
+            error = abs(float(getattr(message.sensor_data, field_name)) - float(getattr(original, field_name)))
+            result.max_error[field_name] = max(result.max_error[field_name], error)
+
+    result.delivered = len(received)
+    result.payload_bytes = radio.payload_bytes
+    result.max_frame = max(frame_sizes, default=0)
+    result.keyframes = link.encoder.keyframes
+    result.deltas = link.encoder.deltas
+    result.airtime_s = radio.airtime_total_s
+    return result
+
+def run_benchmark(devices: int = 50, readings: int = 500, interval_s: float = 60.0, spreading_factor: int = 9,
+                  uplink_loss: float = 0.0, downlink_loss: float = 0.0, seed: int = 0) -> Dict[str, object]:
+    rng = random.Random(seed)
+    simulator = SensorSimulator(FuelType.PETROL)
+
+    walk_streams, noisy_streams = {}, {}
+    for device in range(devices):
+        device_id = f"TANK_{device:04d}"
+        start = simulator.generate_reading("normal")
+        start.timestamp = 1_700_000_000.0
+        walk = [start]
+        for _ in range(readings - 1):
+            walk.append(random_walk(rng, walk[-1], interval_s))
+        walk_streams[device_id] = walk
+
+        noisy = []
+        for i in range(readings):
+            reading = simulator.generate_reading("normal")
+            reading.timestamp = 1_700_000_000.0 + i * interval_s
+            noisy.append(reading)
+        noisy_streams[device_id] = noisy
+
+    sample = walk_streams["TANK_0000"][0]
+    json_bytes = len(MessageFormatter.format_json_payload(DeviceMessage(
+        "TANK_0000", sample.timestamp, MessageType.SENSOR_DATA, RiskLevel.SAFE, sample, None,
+        90, 70, -17.8216, 31.0492, "")))
+
+    results = [
+        run_codec("keyframes only", walk_streams, interval_s, 1, spreading_factor, uplink_loss, downlink_loss, seed),
+        run_codec("delta, drift", walk_streams, interval_s, 64, spreading_factor, uplink_loss, downlink_loss, seed),
+        run_codec("delta, noisy", noisy_streams, interval_s, 64, spreading_factor, uplink_loss, downlink_loss, seed),
+    ]
+    return {"json_bytes": json_bytes, "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description="LoRa codec bytes-per-reading benchmark")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--readings", type=int, default=500, help="Readings per device")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between readings")
+    parser.add_argument("--sf", type=int, default=9, help="Spreading factor")
+    parser.add_argument("--uplink-loss", type=float, default=0.0)
+    parser.add_argument("--downlink-loss", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = run_benchmark(args.devices, args.readings, args.interval, args.sf,
+                           args.uplink_loss, args.downlink_loss, args.seed)
+    print(f"JSON payload: {report['json_bytes']} B/reading (does not fit a 51-byte LoRa frame)")
+    for result in report["results"]:
+        print(result.line())
+    errors = report["results"][1].max_error
+    print("Max quantization error: " + ", ".join(f"{name} {error:g}" for name, error in errors.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Store-and-forward fault-injection harness
+Sends a stream of device messages through CommunicationManager while the link drops out
+and sends fail at random, restarts the offline buffer from disk mid-outage, then checks
+that every alert and each device's latest sensor data was delivered and times the drains.
+Sends keep failing at random to the end; only the manager's own retries recover them.
+
+    python testing/store_forward_harness.py --devices 50 --ticks 400 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from communication_system import (AlertConfig, AlertContact, CommunicationChannel, CommunicationManager,
+                                  DeviceMessage, MessageType)
+from risk_assessment_engine import RiskAssessmentEngine, RiskLevel, SensorSimulator, FuelType
+from store_and_forward import OfflineBuffer
+
+class FlakySink:
+    """Stand-in channel handler that fails while down or at random"""
+
+    def __init__(self, rng: random.Random, error_rate: float):
+        self.rng = rng
+        self.error_rate = error_rate
+        self.down = False
+        self.delivered: Set[Tuple[str, str]] = set()  # (message_id, contact)
+
+    async def __call__(self, message: DeviceMessage, contact: AlertContact):
+        if self.down:
+            raise ConnectionError("link down")
+        if self.rng.random() < self.error_rate:
+            raise ConnectionError("injected send failure")
+        self.delivered.add((message.message_id, contact.name))
+
+@dataclass
+class HarnessReport:
+    sent: int = 0
+    outages: int = 0
+    lost_alerts: int = 0
+    lost_latest_sensor_data: int = 0
+    max_buffered: int = 0
+    compacted: int = 0
+    dropped: int = 0
+    drain_times_s: List[float] = field(default_factory=list)
+    drained: int = 0
+    settle_s: float = 0.0         # Time for retries to empty the buffer after the last message
+    left_buffered: int = 0
+    disk_bytes: int = 0
+    file_bytes: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return (self.lost_alerts == 0 and self.lost_latest_sensor_data == 0 and self.left_buffered == 0
+                and self.file_bytes == self.disk_bytes)
+
+    def summary(self) -> str:
+        drain_total = sum(self.drain_times_s)
+        return "\n".join([
+            f"Messages: {self.sent:,} over {self.outages} outages",
+            f"Lost alerts: {self.lost_alerts}, lost latest sensor data: {self.lost_latest_sensor_data}",
+            f"Buffer: peak {self.max_buffered} records, {self.compacted:,} compacted, {self.dropped} dropped",
+            f"Drain: {self.drained:,} records in {drain_total * 1000:.1f} ms "
+            f"(max {max(self.drain_times_s, default=0) * 1000:.1f} ms per reconnect, "
+            f"{self.drained / drain_total if drain_total else 0:,.0f} records/s)",
+            f"Retries: buffer emptied {self.settle_s * 1000:.0f} ms after the last message, "
+            f"{self.left_buffered} left",
+            f"Disk: {self.file_bytes:,} bytes on disk, bound {self.disk_bytes:,}",
+        ])
+
+async def run_harness(devices: int = 50, ticks: int = 400, outage_every: int = 80, outage_length: int = 30,
+                      error_rate: float = 0.05, alert_rate: float = 0.02, capacity: int = 1024,
+                      seed: int = 0, settle_timeout_s: float = 10.0) -> HarnessReport:
+    rng = random.Random(seed)
+    report = HarnessReport()
+    simulator = SensorSimulator(FuelType.PETROL)
+    engine = RiskAssessmentEngine(FuelType.PETROL)
+
+    workdir = tempfile.mkdtemp(prefix="store_forward_")
+    path = os.path.join(workdir, "offline.buf")
+    sink = FlakySink(rng, error_rate)
+    config = AlertConfig(auto_escalate=False, retry_initial_s=0.005, retry_max_s=0.05)
+    manager = CommunicationManager(config, OfflineBuffer(path, capacity=capacity))
+    for channel in (CommunicationChannel.WEBHOOK, CommunicationChannel.HTTP_POST):
+        manager.channel_handlers[channel] = sink
+    contacts = [
+        AlertContact("Control Room", "", "", "Operations", 1, [CommunicationChannel.HTTP_POST]),
+        AlertContact("Safety Manager", "", "", "Safety", 1, [CommunicationChannel.WEBHOOK]),
+    ]
+    for contact in contacts:
+        manager.add_contact(contact)
+
+    expected_alerts: Set[str] = set()
+    latest_sensor_data: Dict[str, str] = {}
+    outage_ends = -1
+
+    for tick in range(ticks):
+        if tick % outage_every == outage_every // 2:
+            report.outages += 1
+            outage_ends = tick + outage_length
+            sink.down = True
+            for channel in manager.channel_handlers:
+                await manager.set_link_state(channel, False)
+        elif tick == outage_ends:
+            sink.down = False
+            start = time.perf_counter()
+            for channel in list(manager.channel_handlers):
+                report.drained += await manager.set_link_state(channel, True)
+            report.drain_times_s.append(time.perf_counter() - start)
+        elif tick == outage_ends - outage_length // 2:
+            # Simulated gateway restart in the middle of an outage: reopen the buffer from disk
+            buffered = len(manager.offline_buffer)
+            report.compacted += manager.offline_buffer.compacted
+            report.dropped += manager.offline_buffer.dropped
+            manager.offline_buffer.close()
+            manager.offline_buffer = OfflineBuffer(path)
+            assert len(manager.offline_buffer) == buffered, "records lost across restart"
+
+        for device in range(devices):
+            device_id = f"TANK_{device:04d}"
+            is_alert = rng.random() < alert_rate
+            reading = simulator.generate_reading("fire_event" if is_alert else "gas_leak")
+            message = DeviceMessage(
+                device_id=device_id,
+                timestamp=1_700_000_000.0 + tick,
+                message_type=MessageType.ALERT if is_alert else MessageType.SENSOR_DATA,
+                risk_level=RiskLevel.CRITICAL if is_alert else RiskLevel.MEDIUM,
+                sensor_data=reading,
+                risk_assessment=engine.assess_risk(reading) if is_alert else None,
+                battery_level=rng.randint(20, 100),
+                signal_strength=rng.randint(0, 100),
+                gps_lat=-17.8216,
+                gps_lon=31.0492,
+                message_id=""
+            )
+            await manager.send_message(message)
+            report.sent += 1
+            if is_alert:
+                expected_alerts.add(message.message_id)
+            else:
+                latest_sensor_data[device_id] = message.message_id
+        report.max_buffered = max(report.max_buffered, len(manager.offline_buffer))
+        await asyncio.sleep(0)  # Let the manager's retry task run between ticks
+
+    # A run may end mid-outage: the link monitor reports reconnect as usual
+    if sink.down:
+        sink.down = False
+        for channel in list(manager.channel_handlers):
+            report.drained += await manager.set_link_state(channel, True)
+
+    # Injected failures continue; only the manager's retry/backoff can deliver what is left
+    start = time.perf_counter()
+    while len(manager.offline_buffer) and time.perf_counter() - start < settle_timeout_s:
+        await asyncio.sleep(0.005)
+    report.settle_s = time.perf_counter() - start
+    report.left_buffered = len(manager.offline_buffer)
+    await manager.close()
+
+    # MEDIUM goes to priority-1 contacts only, CRITICAL to everyone: here both contacts in both cases
+    report.lost_alerts = sum(1 for message_id in expected_alerts for contact in contacts
+                             if (message_id, contact.name) not in sink.delivered)
+    report.lost_latest_sensor_data = sum(1 for message_id in latest_sensor_data.values() for contact in contacts
+                                         if (message_id, contact.name) not in sink.delivered)
+    report.compacted += manager.offline_buffer.compacted
+    report.dropped += manager.offline_buffer.dropped
+    report.disk_bytes = manager.offline_buffer.disk_bytes
+    report.file_bytes = os.path.getsize(path)
+    manager.offline_buffer.close()
+    os.remove(path)
+    os.rmdir(workdir)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Store-and-forward fault-injection harness")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=400)
+    parser.add_argument("--outage-every", type=int, default=80)
+    parser.add_argument("--outage-length", type=int, default=30)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--capacity", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    report = asyncio.run(run_harness(args.devices, args.ticks, args.outage_every, args.outage_length,
+                                     args.error_rate, capacity=args.capacity, seed=args.seed))
+    print(report.summary())
+    sys.exit(0 if report.ok else 1)
+
+if __name__ == "__main__":
+    main()
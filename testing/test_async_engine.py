@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the event-loop-safe async risk engine
+"""
+
+import asyncio
+import gc
+import random
+import time
+
+from async_engine import AsyncRiskEngine, assess_batch
+from load_test import EventLoopLagMonitor, percentile
+from risk_assessment_engine import RiskAssessmentEngine, SensorSimulator, FuelType
+
+SCENARIOS = ["normal", "normal", "gas_leak", "temperature_rise", "fire_event"]
+
+def test_batch_scoring_matches_assess_risk():
+    random.seed(3)
+    simulator = SensorSimulator(FuelType.DIESEL)
+    readings = [simulator.generate_reading(random.choice(SCENARIOS)) for _ in range(3000)]
+    devices = [i % 40 for i in range(len(readings))]
+
+    def engines():
+        made = {d: RiskAssessmentEngine(FuelType.DIESEL) for d in range(40)}
+        made[0].thresholds["gas_warning_ppm"] = 200  # Per-device tuning
+        made[1] = RiskAssessmentEngine(FuelType.DIESEL, dispersion_mode="plume")
+        return made
+
+    scalar, batched = engines(), engines()
+    expected = [scalar[d].assess_risk(r) for d, r in zip(devices, readings)]
+    actual = []
+    for start in range(0, len(readings), 128):
+        chunk = slice(start, start + 128)
+        actual += assess_batch([batched[d] for d in devices[chunk]], readings[chunk])
+    assert actual == expected
+
+def test_results_resolve_in_order_per_device():
+    async def scenario():
+        engine = AsyncRiskEngine(FuelType.PETROL, shards=3, max_batch=50)
+        simulator = SensorSimulator(FuelType.PETROL)
+        submitted = {f"TANK_{d}": [] for d in range(7)}
+        futures = []
+        for i in range(700):
+            device_id = f"TANK_{i % 7}"
+            reading = simulator.generate_reading("gas_leak")
+            reading.timestamp = 1_700_000_000.0 + i
+            submitted[device_id].append(reading.timestamp)
+            futures.append((device_id, engine.submit(device_id, reading)))
+
+        resolved = {device_id: [] for device_id in submitted}
+        for device_id, future in futures:
+            resolved[device_id].append((await future).timestamp)
+        await engine.close()
+        assert resolved == submitted
+        assert all(len(engine.engine(d).trend_analyzer.history) == 30 for d in submitted)
+        assert engine.batches > 1
+
+    asyncio.run(scenario())
+
+def test_event_loop_lag_stays_low_at_full_ingest():
+    async def scenario():
+        engine = AsyncRiskEngine(FuelType.PETROL)
+        simulator = SensorSimulator(FuelType.PETROL)
+        readings = [simulator.generate_reading("gas_leak") for _ in range(500)]
+        scored = []
+        gc.collect()
+        monitor = EventLoopLagMonitor(interval_s=0.005)
+        monitor.start()
+
+        start = next_tick = time.perf_counter()
+        while time.perf_counter() - start < 2.0:
+            # 500 tanks at 5 Hz
+            for i, reading in enumerate(readings):
+                engine.submit(f"TANK_{i:03d}", reading).add_done_callback(scored.append)
+            next_tick += 0.2
+            await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+        await engine.close()
+        await monitor.stop()
+        assert len(scored) == engine.readings
+        return percentile(monitor.take(), 99)
+
+    assert asyncio.run(scenario()) < 0.010
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the sensor data quality pipeline
+"""
+
+import math
+import random
+
+import numpy as np
+
+from data_quality import DataQualityPipeline, ewma_batch
+from risk_assessment_engine import RiskAssessmentEngine, RiskLevel, SensorFault, SensorSimulator, FuelType
+
+def _series(count: int, seed: int = 7):
+    random.seed(seed)
+    simulator = SensorSimulator(FuelType.PETROL)
+    readings = []
+    for i in range(count):
+        reading = simulator.generate_reading("normal")
+        reading.timestamp = 1_700_000_000.0 + i
+        reading.gas_lpg_ppm = 50.0 + random.gauss(0, 3)
+        reading.temperature_c = 28.0 + random.gauss(0, 0.05)
+        reading.humidity_rh = 55.0 + random.gauss(0, 0.5)
+        readings.append(reading)
+    return readings
+
+def test_spike_is_replaced_by_median():
+    readings = _series(30)
+    readings[20].gas_lpg_ppm = 4000.0
+    pipeline = DataQualityPipeline()
+    cleaned = [pipeline.process("TANK_A_001", r) for r in readings]
+    assert cleaned[20].fault_flags & SensorFault.SPIKE
+    assert cleaned[20].gas_lpg_ppm < 100
+
+def test_persistent_step_is_not_hidden():
+    # A real leak: gas steps from ~50 to 8000 ppm and stays there
+    readings = _series(40)
+    for reading in readings[20:]:
+        reading.gas_lpg_ppm = 8000.0 + random.gauss(0, 20)
+    pipeline = DataQualityPipeline(step_samples=3)
+    cleaned = [pipeline.process("TANK_A_001", r) for r in readings]
+    # At most the first step_samples - 1 samples are held at the old median
+    assert all(r.gas_lpg_ppm > 7000 for r in cleaned[22:])
+    assert not any(r.fault_flags & SensorFault.SPIKE for r in cleaned[22:])
+
+    engine = RiskAssessmentEngine(FuelType.PETROL)
+    levels = [engine.assess_risk(r).risk_level for r in cleaned[22:26]]
+    assert all(level != RiskLevel.SAFE for level in levels)
+
+    batched = pipeline.process_batch(readings)
+    assert [r.fault_flags for r in batched] == [r.fault_flags for r in cleaned]
+
+def test_flat_healthy_channels_are_not_stuck():
+    readings = _series(60)
+    for reading in readings:
+        reading.gas_smoke_ppm = 0.0     # Clean air: resting at the sensor floor
+    for reading in readings[10:]:
+        reading.humidity_rh = 55.0      # Stable humidity, quantized output
+        reading.temperature_c = 28.0
+        reading.gas_lpg_ppm = 50.0
+    pipeline = DataQualityPipeline(stuck_samples=20)
+    cleaned = [pipeline.process("TANK_A_001", r) for r in readings]
+    # Nothing else changed while they were flat, so no channel is singled out as stuck
+    assert not any(r.fault_flags & SensorFault.STUCK for r in cleaned)
+    assert [r.fault_flags for r in pipeline.process_batch(readings)] == [r.fault_flags for r in cleaned]
+
+def test_stuck_sensor_lowers_confidence():
+    readings = _series(40)
+    for reading in readings[10:]:
+        reading.temperature_c = 31.5
+    pipeline = DataQualityPipeline(stuck_samples=20)
+    cleaned = [pipeline.process("TANK_A_001", r) for r in readings]
+    assert cleaned[-1].fault_flags & SensorFault.STUCK
+    assert not cleaned[20].fault_flags & SensorFault.STUCK
+
+    engine = RiskAssessmentEngine(FuelType.PETROL)
+    faulty = engine.assess_risk(cleaned[-1])
+    clean = engine.assess_risk(readings[0])
+    assert faulty.confidence <= 0.5 < clean.confidence
+
+def test_gaps_are_filled_and_flagged():
+    readings = _series(20)
+    readings[10].gas_lpg_ppm = math.nan
+    readings[11].temperature_c = 400.0
+    pipeline = DataQualityPipeline()
+    cleaned = [pipeline.process("TANK_A_001", r) for r in readings]
+    assert cleaned[10].fault_flags & SensorFault.GAP
+    assert cleaned[11].fault_flags & SensorFault.OUT_OF_RANGE
+    assert 40 < cleaned[10].gas_lpg_ppm < 60
+    assert 27 < cleaned[11].temperature_c < 29
+
+def test_batch_flags_match_streaming():
+    readings = _series(200)
+    readings[50].gas_lpg_ppm = 9000.0
+    readings[80].humidity_rh = math.nan
+    readings[120].temperature_c = 60.0
+    for reading in readings[150:]:
+        reading.gas_smoke_ppm = 12.0
+
+    pipeline = DataQualityPipeline()
+    streamed = [pipeline.process("TANK_A_001", r) for r in readings]
+    batched = pipeline.process_batch(readings)
+
+    assert [r.fault_flags for r in streamed] == [r.fault_flags for r in batched]
+    gas_streamed = np.array([r.gas_lpg_ppm for r in streamed])
+    gas_batched = np.array([r.gas_lpg_ppm for r in batched])
+    assert np.allclose(gas_streamed, gas_batched)
+
+def test_ewma_batch_matches_recurrence():
+    values = np.random.default_rng(3).normal(50, 5, 1000)
+    expected = []
+    level = values[0]
+    for value in values:
+        level = 0.3 * value + 0.7 * level
+        expected.append(level)
+    assert np.allclose(ewma_batch(values, alpha=0.3), expected)
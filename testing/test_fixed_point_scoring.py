@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Tests for the fixed-point scoring core
+"""
+
+from fixed_point_parity import run_parity
+from fixed_point_scoring import FixedPointScoringCore, Q_ONE
+from risk_assessment_engine import RiskLevel, SensorSimulator, FuelType
+
+def test_flame_is_critical():
+    core = FixedPointScoringCore(FuelType.PETROL)
+    reading = SensorSimulator(FuelType.PETROL).generate_reading("fire_event")
+    assert core.score_reading(reading) == (RiskLevel.CRITICAL.value, Q_ONE)
+
+def test_state_is_preallocated():
+    core = FixedPointScoringCore(FuelType.DIESEL)
+    buffer = core.gas_history
+    simulator = SensorSimulator(FuelType.DIESEL)
+    for _ in range(50):
+        core.score_reading(simulator.generate_reading("gas_leak"))
+    assert core.gas_history is buffer
+    assert len(buffer) == 10
+
+def test_parity_with_engine():
+    for fuel_type in FuelType:
+        report = run_parity(readings=5000, devices=10, fuel_type=fuel_type, seed=1)
+        assert report.edge_lower == 0, report.summary()
+        assert report.mismatch_rate < 0.001, report.summary()
+        assert report.max_score_diff < 1e-3, report.summary()
+
+def test_raw_input_parity_stays_within_a_rounding_step():
+    # Cloud sees unquantized readings; quantization rounds toward higher risk
+    for fuel_type in FuelType:
+        report = run_parity(readings=5000, devices=10, fuel_type=fuel_type, quantize_inputs=False, seed=1)
+        assert report.mismatch_rate < 0.001, report.summary()
+        assert report.max_score_diff < 0.01, report.summary()
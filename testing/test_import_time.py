@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Tests that the core modules stay cheap to import
+"""
+
+import subprocess
+import sys
+
+from import_benchmark import REPO_ROOT, loaded_heavy_modules
+
+def test_core_modules_do_not_import_heavy_backends():
+    assert loaded_heavy_modules("risk_assessment_engine") == []
+    assert loaded_heavy_modules("communication_system") == []
+
+def test_scalar_engine_runs_without_numpy():
+    script = (
+        "import sys; sys.modules['numpy'] = None\n"
+        "from risk_assessment_engine import RiskAssessmentEngine, SensorSimulator\n"
+        "engine = RiskAssessmentEngine(); simulator = SensorSimulator()\n"
+        "for _ in range(12): engine.assess_risk(simulator.generate_reading('gas_leak'))\n"
+        "from communication_system import MessageFormatter\n"
+        "print('ok')\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT,
+                            capture_output=True, text=True)
+    assert result.stdout.strip() == "ok", result.stderr
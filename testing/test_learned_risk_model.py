@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the learned risk model and shadow scorer
+"""
+
+import json
+import logging
+
+import numpy as np
+
+from learned_risk_model import (FEATURE_NAMES, IncidentLabel, LogisticRiskModel, ShadowRiskScorer,
+                                extract_features, label_readings, load_logged_readings)
+from risk_assessment_engine import RiskAssessmentEngine, SensorSimulator, FuelType
+
+def _training_set(count: int = 900):
+    simulator = SensorSimulator(FuelType.PETROL)
+    readings, labels = [], []
+    for i in range(count):
+        scenario = "gas_leak" if i % 3 == 0 else "normal"
+        readings.append(simulator.generate_reading(scenario))
+        labels.append(1.0 if scenario == "gas_leak" else 0.0)
+    return readings, np.array(labels)
+
+def test_features_include_interactions():
+    readings, _ = _training_set(10)
+    X = extract_features(readings)
+    assert X.shape == (10, len(FEATURE_NAMES))
+    assert np.all(np.isfinite(X))
+
+def test_model_separates_leaks_and_round_trips(tmp_path):
+    readings, labels = _training_set()
+    model = LogisticRiskModel(FuelType.PETROL).fit(extract_features(readings), labels)
+    scores = model.score_readings(readings)
+    assert np.mean((scores >= 0.5) == labels.astype(bool)) > 0.95
+
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = LogisticRiskModel.load(path)
+    assert np.allclose(loaded.score_readings(readings), scores)
+
+def test_logged_readings_are_labelled(tmp_path):
+    simulator = SensorSimulator(FuelType.PETROL)
+    log_file = tmp_path / "fire_detection.log"
+    readings = [simulator.generate_reading("normal") for _ in range(5)]
+    for i, reading in enumerate(readings):
+        reading.timestamp = 1000.0 + i * 100
+    with open(log_file, "w") as f:
+        for reading in readings:
+            entry = {"device_id": "TANK_A_001", "timestamp": reading.timestamp,
+                     "sensor_data": reading.__dict__}
+            f.write(f"2025-07-15 10:00:00,000 - data_logger - INFO - {json.dumps(entry)}\n")
+        f.write("2025-07-15 10:00:00,000 - __main__ - INFO - unrelated\n")
+
+    entries = load_logged_readings(str(log_file))
+    assert len(entries) == 5
+    labels = label_readings(entries, [IncidentLabel("TANK_A_001", 1400.0, 1450.0)], lead_time_s=250.0)
+    assert labels.tolist() == [0.0, 0.0, 1.0, 1.0, 1.0]
+
+def test_shadow_scorer_logs_both_scores(caplog):
+    readings, labels = _training_set()
+    model = LogisticRiskModel(FuelType.PETROL).fit(extract_features(readings), labels)
+    scorer = ShadowRiskScorer(FuelType.PETROL, model)
+
+    with caplog.at_level(logging.INFO, logger="shadow_scorer"):
+        assessments = scorer.assess_batch("TANK_A_001", readings[:4])
+    assert len(assessments) == 4
+    logged = [json.loads(record.message) for record in caplog.records]
+    assert len(logged) == 4
+    assert {"rule_score", "model_score", "rule_level"} <= set(logged[0])
+
+def test_shadow_scorer_keeps_devices_apart():
+    readings, labels = _training_set()
+    model = LogisticRiskModel(FuelType.PETROL).fit(extract_features(readings), labels)
+    scorer = ShadowRiskScorer(FuelType.PETROL, model)
+    separate = {device_id: RiskAssessmentEngine(FuelType.PETROL) for device_id in ("TANK_A", "TANK_B")}
+
+    for i, reading in enumerate(readings[:40]):
+        device_id = "TANK_A" if i % 2 else "TANK_B"
+        shadow = scorer.assess_risk(device_id, reading)
+        assert shadow.risk_score == separate[device_id].assess_risk(reading).risk_score
+    assert set(scorer.engines) == {"TANK_A", "TANK_B"}
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the alert-storm load harness
+"""
+
+import asyncio
+
+from load_test import EventLoopLagMonitor, LatencyReservoir, percentile, run_load_test
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 99) == 0.0
+
+def test_latency_reservoir_stays_bounded():
+    reservoir = LatencyReservoir(size=1000)
+    for start in range(0, 100_000, 500):
+        reservoir.extend(range(start, start + 500))
+    assert len(reservoir.samples) == 1000
+    assert reservoir.count == 100_000 and reservoir.max == 99_999
+    assert abs(reservoir.percentile(50) - 50_000) < 5_000
+    assert abs(reservoir.percentile(99) - 99_000) < 1_500
+
+def test_lag_monitor_sees_blocking():
+    async def scenario():
+        import time
+
+        monitor = EventLoopLagMonitor(interval_s=0.005)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.05)  # Block the loop on purpose
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        return monitor.max_lag_s
+
+    assert asyncio.run(scenario()) >= 0.04
+
+def test_short_storm_delivers_alerts_to_local_sinks():
+    report = asyncio.run(run_load_test(tanks=20, duration_s=3.0, storm_every_s=1.0, storm_length_s=1.0,
+                                       latency_ms=5.0, jitter_ms=5.0, error_rate=0.0, report_every_s=1.0,
+                                       verbose=False))
+    assert report.alerts > 0
+    assert report.received["http"] > 0 and report.received["webhook"] > 0 and report.received["sms"] > 0
+    assert sum(report.errors.values()) == 0
+    assert 0 < report.latency_p50_ms <= report.latency_p99_ms
+    assert report.samples and report.max_tasks > 0
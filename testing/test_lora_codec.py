@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the LoRa telemetry codec, radio stand-in and LORA channel handler
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from communication_system import (AlertConfig, AlertContact, CommunicationChannel, CommunicationManager,
+                                  DeviceMessage, MessageType)
+from lora_codec import (MAX_FRAME_BYTES, DutyCycleExceeded, LoRaFrameDecoder, LoRaFrameEncoder, LoRaLink,
+                        SimulatedLoRaRadio)
+from lora_benchmark import run_benchmark
+from risk_assessment_engine import RiskLevel, SensorSimulator, FuelType
+from store_and_forward import OfflineBuffer
+
+def make_message(reading, device_id="TANK_A", risk_level=RiskLevel.SAFE) -> DeviceMessage:
+    return DeviceMessage(device_id, reading.timestamp, MessageType.SENSOR_DATA, risk_level, reading, None,
+                         85, 70, -17.8216, 31.0492, "")
+
+def test_round_trip_with_deltas_and_wind_wrap():
+    simulator = SensorSimulator(FuelType.PETROL)
+    encoder, decoder = LoRaFrameEncoder(), LoRaFrameDecoder()
+    reading = simulator.generate_reading("normal")
+    sizes = []
+    for i in range(40):
+        reading.timestamp += 30.0
+        reading.temperature_c += 0.3
+        reading.wind_direction_deg = (355 + 3 * i) % 360
+        seq, frame = encoder.encode(make_message(reading))
+        sizes.append(len(frame))
+        decoded, decoded_seq = decoder.decode("TANK_A", frame)
+        encoder.acknowledge("TANK_A", decoded_seq)
+
+        assert decoded_seq == seq
+        assert decoded.sensor_data.wind_direction_deg == reading.wind_direction_deg
+        assert abs(decoded.sensor_data.temperature_c - reading.temperature_c) <= 0.05 + 1e-9
+        assert abs(decoded.sensor_data.gas_lpg_ppm - reading.gas_lpg_ppm) <= 0.5
+        assert abs(decoded.timestamp - reading.timestamp) <= 0.0005
+        assert decoded.gps_lat == pytest.approx(-17.8216) and decoded.battery_level == 85
+    assert max(sizes) <= MAX_FRAME_BYTES
+    assert encoder.deltas > 30 and sum(sizes[1:]) / 39 < sizes[0]
+
+def test_lost_frames_and_acks_never_break_decoding():
+    rng = random.Random(1)
+    simulator = SensorSimulator(FuelType.PETROL)
+    received = []
+    decoder = LoRaFrameDecoder(on_message=received.append)
+    clock = [0.0]
+    radio = SimulatedLoRaRadio(decoder.receive, uplink_loss=0.3, downlink_loss=0.5, clock=lambda: clock[0], seed=2)
+    link = LoRaLink(radio)
+
+    reading = simulator.generate_reading("normal")
+    for i in range(300):
+        clock[0] = i * 60.0
+        reading.timestamp = 1_700_000_000.0 + i * 60.0
+        reading.gas_lpg_ppm = max(0.0, reading.gas_lpg_ppm + rng.uniform(-3, 3))
+        link.send(make_message(reading))
+    assert radio.lost > 0
+    assert len(received) == radio.frames - radio.lost
+    assert link.encoder.deltas > 0
+
+def test_restarted_decoder_resyncs_with_a_keyframe():
+    simulator = SensorSimulator(FuelType.PETROL)
+    received = []
+    decoders = [LoRaFrameDecoder(on_message=received.append)]
+    clock = [0.0]
+    radio = SimulatedLoRaRadio(lambda device_id, frame: decoders[0].receive(device_id, frame),
+                               clock=lambda: clock[0])
+    link = LoRaLink(radio)
+
+    reading = simulator.generate_reading("normal")
+    for i in range(50):
+        if i == 5:
+            decoders[0] = LoRaFrameDecoder(on_message=received.append)  # Ingest restart loses every reference
+        clock[0] = i * 60.0
+        reading.timestamp = 1_700_000_000.0 + i * 60.0
+        reading.temperature_c += 0.1
+        link.send(make_message(reading))
+    # Only the deltas sent before the device gives up on its reference go undelivered
+    assert len(received) >= 48
+    assert link.encoder.deltas > 40
+
+def test_radio_enforces_duty_cycle():
+    clock = [0.0]
+    radio = SimulatedLoRaRadio(lambda device_id, frame: 0, spreading_factor=12, clock=lambda: clock[0])
+    assert radio.airtime_s(32) > SimulatedLoRaRadio(None, spreading_factor=7).airtime_s(32) * 10
+    radio.transmit("TANK_A", bytes(32))
+    with pytest.raises(DutyCycleExceeded):
+        radio.transmit("TANK_A", bytes(32))
+    radio.transmit("TANK_B", bytes(32))  # Duty cycle is per device
+    clock[0] += radio.airtime_s(32) / radio.duty_cycle
+    radio.transmit("TANK_A", bytes(32))
+    with pytest.raises(ValueError):
+        radio.transmit("TANK_C", bytes(MAX_FRAME_BYTES + 1))
+
+def test_lora_channel_buffers_while_duty_cycle_limited(tmp_path):
+    async def scenario():
+        received = []
+        decoder = LoRaFrameDecoder(on_message=received.append)
+        clock = [0.0]
+        manager = CommunicationManager(AlertConfig(auto_escalate=False),
+                                       OfflineBuffer(str(tmp_path / "offline.buf"), capacity=8))
+        manager.lora_link = LoRaLink(SimulatedLoRaRadio(decoder.receive, clock=lambda: clock[0]))
+        manager.add_contact(AlertContact("Gateway", "", "", "Operations", 1, [CommunicationChannel.LORA]))
+
+        simulator = SensorSimulator(FuelType.PETROL)
+        first, second = simulator.generate_reading("gas_leak"), simulator.generate_reading("gas_leak")
+        second.timestamp = first.timestamp + 1.0
+        await manager.send_message(make_message(first, risk_level=RiskLevel.MEDIUM))
+        await manager.send_message(make_message(second, risk_level=RiskLevel.MEDIUM))
+        assert len(received) == 1 and len(manager.offline_buffer) == 1
+
+        clock[0] += 60.0
+        assert await manager.drain_offline_buffer() == 1
+        assert [m.risk_level for m in received] == [RiskLevel.MEDIUM, RiskLevel.MEDIUM]
+        manager.offline_buffer.close()
+
+    asyncio.run(scenario())
+
+def test_unacknowledged_lora_alert_is_buffered(tmp_path):
+    async def scenario():
+        received = []
+        decoder = LoRaFrameDecoder(on_message=received.append)
+        clock = [0.0]
+        manager = CommunicationManager(AlertConfig(auto_escalate=False),
+                                       OfflineBuffer(str(tmp_path / "offline.buf"), capacity=8))
+        manager.lora_link = LoRaLink(SimulatedLoRaRadio(decoder.receive, uplink_loss=1.0, clock=lambda: clock[0]))
+        manager.add_contact(AlertContact("Gateway", "", "", "Operations", 1, [CommunicationChannel.LORA]))
+
+        reading = SensorSimulator(FuelType.PETROL).generate_reading("fire_event")
+        alert = make_message(reading, risk_level=RiskLevel.CRITICAL)
+        alert.message_type = MessageType.ALERT
+        await manager.send_message(alert)
+        assert not received and len(manager.offline_buffer) == 1
+
+        manager.lora_link.radio.uplink_loss = 0.0
+        clock[0] += 60.0
+        assert await manager.drain_offline_buffer() == 1
+        assert [m.risk_level for m in received] == [RiskLevel.CRITICAL]
+        await manager.close()
+        manager.offline_buffer.close()
+
+    asyncio.run(scenario())
+
+def test_benchmark_delta_beats_keyframes():
+    report = run_benchmark(devices=5, readings=80)
+    keyframes_only, drift, noisy = report["results"]
+    assert report["json_bytes"] > MAX_FRAME_BYTES
+    assert drift.payload_bytes < keyframes_only.payload_bytes
+    assert max(r.max_frame for r in report["results"]) <= MAX_FRAME_BYTES
+    assert drift.delivered == drift.readings
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for consistent-hash partitioning and device state handoff
+"""
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+from cluster_harness import run_harness
+from communication_system import AlertConfig, CommunicationManager, DeviceMessage, MessageType
+from partitioning import AssessmentNode, ConsistentHashRing, PartitionedCluster
+from plume_dispersion import GaussianPlumeModel, SiteGrid
+from risk_assessment_engine import RiskAssessmentEngine, RiskLevel, SensorSimulator, FuelType
+
+DEVICES = [f"TANK_{i:04d}" for i in range(2000)]
+
+def test_ring_balances_and_moves_few_keys():
+    ring = ConsistentHashRing([f"node-{i}" for i in range(4)])
+    before = {d: ring.node_for(d) for d in DEVICES}
+    counts = Counter(before.values())
+    assert min(counts.values()) > len(DEVICES) / 4 * 0.6
+
+    ring.add_node("node-4")
+    after = {d: ring.node_for(d) for d in DEVICES}
+    moved = [d for d in DEVICES if before[d] != after[d]]
+    assert all(after[d] == "node-4" for d in moved)
+    assert len(moved) < len(DEVICES) * 0.35
+
+def test_cluster_hands_off_engine_state():
+    cluster = PartitionedCluster()
+    cluster.add_node(AssessmentNode("node-0"))
+    simulator = SensorSimulator(FuelType.PETROL)
+    for _ in range(12):
+        for device_id in DEVICES[:200]:
+            cluster.assess(device_id, simulator.generate_reading("gas_leak"))
+
+    moved = cluster.add_node(AssessmentNode("node-1"))
+    assert 0 < moved < 200
+    assert sum(cluster.distribution().values()) == 200
+    for device_id in DEVICES[:200]:
+        engine = cluster.owner(device_id).engines[device_id]
+        assert len(engine.trend_analyzer.history) == 12
+        assert engine.forecaster.gas.samples == 12
+
+    cluster.remove_node("node-0")
+    assert cluster.distribution() == {"node-1": 200}
+
+def test_plume_engines_move_onto_the_new_nodes_site_model():
+    def site_model():
+        model = GaussianPlumeModel(vapor_density=3.4)
+        model.add_site("farm", SiteGrid(receptors=[(0.0, -50.0)]))
+        return model
+
+    cluster = PartitionedCluster()
+    old_model = site_model()
+    cluster.add_node(AssessmentNode("node-0", plume_models={"farm": old_model}))
+    for device_id in DEVICES[:50]:
+        cluster.nodes["node-0"].engines[device_id] = RiskAssessmentEngine(
+            FuelType.PETROL, dispersion_mode="plume", plume_model=old_model, site_id="farm")
+
+    # A node that cannot serve the site is refused before any device state is released
+    with pytest.raises(ValueError):
+        cluster.add_node(AssessmentNode("node-1"))
+    assert len(cluster.nodes["node-0"].engines) == 50 and list(cluster.nodes) == ["node-0"]
+
+    new_model = site_model()
+    moved = cluster.add_node(AssessmentNode("node-2", plume_models={"farm": new_model}))
+    assert 0 < moved < 50 and sum(cluster.distribution().values()) == 50
+    for engine in cluster.nodes["node-2"].engines.values():
+        assert engine.site_id == "farm" and engine.weather_calculator.plume_model is new_model
+
+    cluster.nodes["node-0"].plume_models.clear()
+    with pytest.raises(ValueError):
+        cluster.remove_node("node-2")
+    assert len(cluster.nodes["node-2"].engines) == moved and "node-2" in cluster.ring.nodes
+
+def test_pending_escalations_follow_the_device():
+    async def scenario():
+        config = AlertConfig(escalation_delay_minutes=5)
+        old_node = AssessmentNode("node-0", comm_manager=CommunicationManager(config))
+        new_node = AssessmentNode("node-1", comm_manager=CommunicationManager(config))
+
+        message = DeviceMessage("TANK_0001", 0.0, MessageType.ALERT, RiskLevel.HIGH, None, None,
+                                80, 70, 0.0, 0.0, "")
+        await old_node.comm_manager.send_message(message)
+        deadline = old_node.comm_manager.pending_escalations[message.message_id].deadline
+
+        new_node.import_devices(old_node.export_devices(["TANK_0001"]))
+        assert old_node.comm_manager.pending_escalations == {}
+        assert new_node.comm_manager.pending_escalations[message.message_id].deadline == deadline
+        for task in new_node.comm_manager._escalation_tasks.values():
+            task.cancel()
+
+    asyncio.run(scenario())
+
+def test_multi_process_harness_runs(capsys):
+    run_harness([2], devices=40, duration=0.2)
+    output = capsys.readouterr().out
+    assert "state intact: True" in output
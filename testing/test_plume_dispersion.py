@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the Gaussian plume dispersion mode
+"""
+
+import numpy as np
+
+from plume_dispersion import GaussianPlumeModel, SiteGrid, StabilityClass, estimate_stability_class
+from risk_assessment_engine import RiskAssessmentEngine, SensorSimulator, FuelType
+
+def test_plume_travels_downwind():
+    model = GaussianPlumeModel(vapor_density=3.4)
+    # Wind from the north carries vapor south (negative y)
+    field = model.concentration_field(3.0, 0, StabilityClass.D)
+    grid = model.sites["default"]
+    assert field[grid.y < -10].sum() > 0
+    assert field[grid.y > 10].sum() == 0
+
+def test_receptor_downwind_worsens_dispersion():
+    model = GaussianPlumeModel(vapor_density=3.4)
+    model.add_site("tank_farm", SiteGrid(receptors=[(0.0, -50.0)]))
+    downwind = model.dispersion_factor(3.0, 0, StabilityClass.D, site_id="tank_farm")
+    upwind = model.dispersion_factor(3.0, 180, StabilityClass.D, site_id="tank_farm")
+    assert downwind > 1.0 > upwind
+
+def test_stable_calm_air_is_worse_than_neutral():
+    assert abs(GaussianPlumeModel().dispersion_factor(3.0, 90, StabilityClass.D) - 1.0) < 0.01
+    model = GaussianPlumeModel(vapor_density=3.4)
+    neutral = model.dispersion_factor(3.0, 90, StabilityClass.D)
+    stable = model.dispersion_factor(0.8, 90, StabilityClass.F)
+    assert stable > neutral
+
+def test_receptorless_site_has_no_preferred_direction():
+    model = GaussianPlumeModel(vapor_density=3.4)
+    factors = [model.dispersion_factor(3.0, direction, StabilityClass.D) for direction in range(0, 360, 15)]
+    assert max(factors) - min(factors) < 1e-6
+
+def test_heavier_vapor_never_disperses_better_in_stable_air():
+    models = [GaussianPlumeModel(vapor_density=density) for density in (1.0, 1.5, 2.0, 3.4, 4.5, 6.0)]
+    for wind_speed, stability in ((2.0, StabilityClass.F), (2.0, StabilityClass.E), (3.0, StabilityClass.E)):
+        factors = [model.dispersion_factor(wind_speed, 90, stability) for model in models]
+        assert factors == sorted(factors)
+        assert factors[-1] > factors[0]
+
+def test_field_is_cached_within_tolerance():
+    model = GaussianPlumeModel(speed_tolerance=0.25, direction_tolerance_deg=5.0)
+    first = model.concentration_field(3.0, 358, StabilityClass.C)
+    count = model.recomputations
+    again = model.concentration_field(3.1, 2, StabilityClass.C)
+    assert again is first
+    assert model.recomputations == count
+
+    model.concentration_field(3.1, 20, StabilityClass.C)
+    assert model.recomputations == count + 1
+
+def test_inversion_forces_stable_class():
+    assert estimate_stability_class(0.5, 5.0, 1025.0) == StabilityClass.F
+    assert estimate_stability_class(6.0, 25.0, 1013.0) == StabilityClass.D
+
+def test_engine_plume_mode():
+    engine = RiskAssessmentEngine(FuelType.PETROL, dispersion_mode="plume")
+    simulator = SensorSimulator(FuelType.PETROL)
+    assessment = engine.assess_risk(simulator.generate_reading("gas_leak"))
+    assert 0.0 <= assessment.risk_score <= 1.0
+    assert np.isfinite(assessment.risk_score)
+
+def test_engines_share_site_model():
+    model = GaussianPlumeModel(vapor_density=3.4)
+    model.add_site("tank_farm", SiteGrid(receptors=[(0.0, -50.0)]))
+    engines = [RiskAssessmentEngine(FuelType.PETROL, dispersion_mode="plume", plume_model=model,
+                                    site_id="tank_farm") for _ in range(3)]
+    simulator = SensorSimulator(FuelType.PETROL)
+    reading = simulator.generate_reading("gas_leak")
+    reading.wind_speed_mps, reading.wind_direction_deg = 3.0, 0
+    count = model.recomputations
+    for engine in engines:
+        engine.assess_risk(reading)
+    # One field for the site, reused by every device there
+    assert model.recomputations == count + 1
+    assert "tank_farm" in model._cache
+
+    handed_off = RiskAssessmentEngine.from_state(engines[0].export_state(), plume_model=model)
+    assert handed_off.site_id == "tank_farm" and handed_off.weather_calculator.plume_model is model
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the risk assessment engine
+"""
+
+import random
+
+from risk_assessment_engine import (HoltForecaster, RiskAssessmentEngine, RiskLevel, SensorSimulator,
+                                    FuelType)
+
+def _ramp(engine: RiskAssessmentEngine, gas_start: float, gas_rate: float, count: int):
+    simulator = SensorSimulator(FuelType.PETROL)
+    assessments = []
+    for i in range(count):
+        reading = simulator.generate_reading("normal")
+        reading.timestamp = 1_700_000_000.0 + i * 2
+        reading.gas_lpg_ppm = gas_start + gas_rate * i * 2
+        reading.gas_smoke_ppm = 0.0
+        reading.temperature_c = 25.0
+        reading.wind_speed_mps = 3.0
+        reading.humidity_rh = 50.0
+        reading.barometric_pressure_hpa = 1013.0
+        assessments.append(engine.assess_risk(reading))
+    return assessments
+
+def test_holt_forecaster_tracks_linear_ramp():
+    forecaster = HoltForecaster()
+    for i in range(30):
+        forecaster.update(float(i), 100.0 + 10.0 * i)
+    assert abs(forecaster.trend - 10.0) < 0.5
+    eta = forecaster.time_to_reach(1000.0)
+    assert abs(eta - (1000.0 - forecaster.level) / 10.0) < 5.0
+
+def test_forecaster_needs_rising_trend():
+    forecaster = HoltForecaster()
+    for i in range(10):
+        forecaster.update(float(i), 500.0 - i)
+    assert forecaster.time_to_reach(1000.0) is None
+
+def test_assessment_exposes_time_to_threshold():
+    engine = RiskAssessmentEngine(FuelType.PETROL)
+    critical = engine.thresholds["gas_critical_ppm"]
+    # Rising 5 ppm/s from 1000 ppm: 25% LEL (3500 ppm) is ~8 minutes away at the start
+    assessments = _ramp(engine, 1000.0, 5.0, 20)
+    forecast = assessments[-1].forecast
+    assert forecast is not None
+    expected = (critical - (1000.0 + 5.0 * 38)) / 5.0
+    assert abs(forecast.gas_eta_s - expected) < 0.2 * expected
+    assert forecast.temp_eta_s is None
+
+def test_preemptive_alert_within_horizon():
+    engine = RiskAssessmentEngine(FuelType.PETROL)
+    # Rising 20 ppm/s from 1500 ppm reaches 3500 ppm in well under the 300 s horizon
+    assessment = _ramp(engine, 1500.0, 20.0, 10)[-1]
+    assert assessment.risk_level.value >= RiskLevel.MEDIUM.value
+    assert any("forecast to reach" in factor for factor in assessment.contributing_factors)
+
+    engine = RiskAssessmentEngine(FuelType.PETROL)
+    engine.thresholds["forecast_horizon_s"] = 0
+    assessment = _ramp(engine, 1500.0, 20.0, 10)[-1]
+    assert not any("forecast to reach" in factor for factor in assessment.contributing_factors)
+
+def test_noisy_flat_input_never_raises_level():
+    random.seed(11)
+    simulator = SensorSimulator(FuelType.PETROL)
+    for rate_hz in (1, 2, 10):
+        engine = RiskAssessmentEngine(FuelType.PETROL)
+        for i in range(1000):
+            reading = simulator.generate_reading("normal")
+            reading.timestamp = 1_700_000_000.0 + i / rate_hz
+            assessment = engine.assess_risk(reading)
+            assert not any("forecast to reach" in factor for factor in assessment.contributing_factors)
+            assert assessment.forecast.gas_eta_s is None
+
+def test_noisy_ramp_is_forecast_before_breach():
+    rng = random.Random(5)
+    simulator = SensorSimulator(FuelType.PETROL)
+    for gas_rate, noise, rate_hz in ((5.0, 30.0, 1), (20.0, 30.0, 10), (10.0, 50.0, 2), (20.0, 30.0, 1)):
+        engine = RiskAssessmentEngine(FuelType.PETROL)
+        critical = engine.thresholds["gas_critical_ppm"]
+        forecast_at = None
+        for i in range(int((critical - 500.0) / gas_rate * rate_hz)):
+            reading = simulator.generate_reading("normal")
+            reading.timestamp = 1_700_000_000.0 + i / rate_hz
+            reading.gas_lpg_ppm = 500.0 + gas_rate * i / rate_hz + rng.gauss(0, noise)
+            reading.gas_smoke_ppm = 0.0
+            assessment = engine.assess_risk(reading)
+            if any("forecast to reach" in factor for factor in assessment.contributing_factors):
+                forecast_at = i / rate_hz
+                break
+        # Pre-emptive alert while the leak is still at least a minute from the threshold
+        assert forecast_at is not None, (gas_rate, noise, rate_hz)
+        assert forecast_at < (critical - 500.0) / gas_rate - 60, (gas_rate, noise, rate_hz, forecast_at)
+
+def test_forecast_uses_current_thresholds():
+    engine = RiskAssessmentEngine(FuelType.PETROL)
+    engine.thresholds["gas_critical_ppm"] = 2500.0  # Tuned after construction
+    assessment = _ramp(engine, 1500.0, 20.0, 10)[-1]
+    expected = (2500.0 - (1500.0 + 20.0 * 18)) / 20.0
+    assert abs(assessment.forecast.gas_eta_s - expected) < 0.2 * expected
+    assert any("2500 ppm (18% LEL)" in factor for factor in assessment.contributing_factors)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the store-and-forward offline buffer
+"""
+
+import asyncio
+import os
+
+from communication_system import (AlertConfig, AlertContact, CommunicationChannel, CommunicationManager,
+                                  DeviceMessage, MessageType)
+from risk_assessment_engine import RiskAssessmentEngine, RiskLevel, SensorSimulator, FuelType
+from store_and_forward import SLOT_HEADER, OfflineBuffer
+from store_forward_harness import run_harness
+
+CONTACT = AlertContact("Control Room", "+1234567890", "ops@site.example", "Operations", 1,
+                       [CommunicationChannel.HTTP_POST])
+
+def make_message(device_id: str, timestamp: float, message_type=MessageType.SENSOR_DATA,
+                 risk_level=RiskLevel.MEDIUM) -> DeviceMessage:
+    return DeviceMessage(device_id, timestamp, message_type, risk_level, None, None, 80, 70, 0.0, 0.0, "")
+
+def test_drain_order_compaction_and_restart(tmp_path):
+    path = str(tmp_path / "offline.buf")
+    buffer = OfflineBuffer(path, capacity=16, slot_size=1024)
+    for t in range(5):
+        buffer.put(make_message("TANK_A", t), CONTACT, CommunicationChannel.HTTP_POST)
+    alert = make_message("TANK_B", 1.0, MessageType.ALERT, RiskLevel.CRITICAL)
+    buffer.put(alert, CONTACT, CommunicationChannel.HTTP_POST)
+    assert len(buffer) == 2 and buffer.compacted == 4
+    buffer.close()
+
+    reopened = OfflineBuffer(path)
+    records = reopened.pending()
+    assert [r.message.message_id for r in records] == [alert.message_id, make_message("TANK_A", 4).message_id]
+    assert records[0].message.risk_level == RiskLevel.CRITICAL
+    assert records[0].contact.channels == [CommunicationChannel.HTTP_POST]
+    assert os.path.getsize(path) == reopened.disk_bytes
+    reopened.close()
+
+def test_corrupt_slot_is_skipped_on_open(tmp_path):
+    path = str(tmp_path / "offline.buf")
+    buffer = OfflineBuffer(path, capacity=8, slot_size=1024)
+    buffer.put(make_message("TANK_A", 0.0), CONTACT, CommunicationChannel.HTTP_POST)
+    # Compaction writes to a fresh slot, so the superseded record is never overwritten in place
+    first_slot = next(iter(buffer._live))
+    buffer.put(make_message("TANK_A", 1.0), CONTACT, CommunicationChannel.HTTP_POST)
+    assert first_slot not in buffer._live and len(buffer) == 1
+    alert = make_message("TANK_B", 1.0, MessageType.ALERT, RiskLevel.CRITICAL)
+    buffer.put(alert, CONTACT, CommunicationChannel.HTTP_POST)
+    torn = buffer._compaction_keys[("TANK_A", "http", CONTACT.name)]
+    buffer.close()
+
+    # Torn write: part of a live slot's payload never reached the disk
+    with open(path, "r+b") as f:
+        f.seek(buffer._offset(torn) + SLOT_HEADER.size + 10)
+        f.write(b"\0" * 20)
+
+    reopened = OfflineBuffer(path)
+    assert reopened.corrupt == 1
+    assert [r.message.message_id for r in reopened.pending()] == [alert.message_id]
+    reopened.close()
+
+def test_full_buffer_evicts_lowest_priority(tmp_path):
+    buffer = OfflineBuffer(str(tmp_path / "offline.buf"), capacity=2, slot_size=1024)
+    buffer.put(make_message("TANK_A", 0.0), CONTACT, CommunicationChannel.HTTP_POST)
+    buffer.put(make_message("TANK_B", 0.0, MessageType.ALERT, RiskLevel.HIGH), CONTACT, CommunicationChannel.HTTP_POST)
+    assert buffer.put(make_message("TANK_C", 0.0, MessageType.ALERT, RiskLevel.CRITICAL),
+                      CONTACT, CommunicationChannel.HTTP_POST)
+    assert sorted(r.message.device_id for r in buffer.pending()) == ["TANK_B", "TANK_C"]
+    assert not buffer.put(make_message("TANK_D", 0.0), CONTACT, CommunicationChannel.HTTP_POST)
+    assert buffer.dropped == 2
+    buffer.close()
+
+def test_manager_buffers_while_down_and_drains_on_reconnect(tmp_path):
+    async def scenario():
+        delivered = []
+
+        async def sink(message, contact):
+            delivered.append(message.message_id)
+
+        manager = CommunicationManager(AlertConfig(auto_escalate=False),
+                                       OfflineBuffer(str(tmp_path / "offline.buf"), capacity=8))
+        manager.channel_handlers[CommunicationChannel.HTTP_POST] = sink
+        manager.add_contact(CONTACT)
+
+        simulator = SensorSimulator(FuelType.PETROL)
+        reading = simulator.generate_reading("fire_event")
+        assessment = RiskAssessmentEngine(FuelType.PETROL).assess_risk(reading)
+        alert = DeviceMessage("TANK_A", reading.timestamp, MessageType.ALERT, RiskLevel.CRITICAL,
+                              reading, assessment, 80, 70, 0.0, 0.0, "")
+
+        await manager.set_link_state(CommunicationChannel.HTTP_POST, False)
+        await manager.send_message(alert)
+        assert delivered == [] and len(manager.offline_buffer) == 1
+
+        assert await manager.set_link_state(CommunicationChannel.HTTP_POST, True) == 1
+        assert delivered == [alert.message_id] and len(manager.offline_buffer) == 0
+        manager.offline_buffer.close()
+
+    asyncio.run(scenario())
+
+def test_failed_send_is_retried_without_link_change(tmp_path):
+    async def scenario():
+        delivered = []
+        failures = [1]
+
+        async def sink(message, contact):
+            if failures[0]:
+                failures[0] -= 1
+                raise ConnectionError("503")
+            delivered.append(message.message_id)
+
+        config = AlertConfig(auto_escalate=False, retry_initial_s=0.01, retry_max_s=0.05)
+        manager = CommunicationManager(config, OfflineBuffer(str(tmp_path / "offline.buf"), capacity=8))
+        manager.channel_handlers[CommunicationChannel.HTTP_POST] = sink
+        manager.add_contact(CONTACT)
+
+        alert = make_message("TANK_A", 1.0, MessageType.ALERT, RiskLevel.CRITICAL)
+        await manager.send_message(alert)
+        assert delivered == [] and len(manager.offline_buffer) == 1
+        for _ in range(100):
+            if delivered:
+                break
+            await asyncio.sleep(0.01)
+        assert delivered == [alert.message_id] and len(manager.offline_buffer) == 0
+        await manager.close()
+        manager.offline_buffer.close()
+
+    asyncio.run(scenario())
+
+def test_fault_injection_harness_loses_nothing():
+    report = asyncio.run(run_harness(devices=10, ticks=120, outage_every=40, outage_length=12, error_rate=0.1))
+    assert report.ok
+    assert report.outages == 3 and report.drained > 0